@@ -0,0 +1,307 @@
+import os
+import json
+import logging
+import time
+import threading
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # optional — falls back to the in-process cache
+    redis = None
+
+# -----------------------------------------------------------
+# 🔐 Environment Variables
+# -----------------------------------------------------------
+REDIS_URL = os.getenv("REDIS_URL")
+MEMORY_CACHE_MAXSIZE = int(os.getenv("MEMORY_CACHE_MAXSIZE", "2048"))
+
+logger = logging.getLogger("rops.cache")
+
+_client = None
+_client_pid = None
+
+# In-process fallback: key -> (expires_at, value), least recently used first.
+# Bounded to MEMORY_CACHE_MAXSIZE; expired entries are swept on write.
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_memory_swept_at = 0.0
+
+MEMORY_SWEEP_INTERVAL = 60  # seconds between expired-entry sweeps
+
+
+# -----------------------------------------------------------
+# 🔌 Backend
+# -----------------------------------------------------------
+def get_redis():
+    """
+    Returns the shared Redis client, or None when REDIS_URL is not set
+    (or the redis package is not installed).
+
+    The client is created lazily per process, so each worker gets its own
+    connection pool (a pool inherited across fork is never reused).
+    """
+    global _client, _client_pid
+
+    if REDIS_URL and redis is not None and (
+        _client is None or _client_pid != os.getpid()
+    ):
+        _client = redis.Redis.from_url(REDIS_URL)
+        _client_pid = os.getpid()
+
+    return _client
+
+
+# -----------------------------------------------------------
+# 🗄️ Cache-aside helpers (non-blocking)
+# -----------------------------------------------------------
+def cache_get(key: str):
+    """
+    Returns the cached value for `key`, or None on miss / cache error.
+    """
+    try:
+        client = get_redis()
+        if client is not None:
+            raw = client.get(key)
+            return json.loads(raw) if raw is not None else None
+
+        with _memory_lock:
+            entry = _memory.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                _memory.pop(key, None)
+                return None
+
+            _memory.move_to_end(key)
+            return value
+
+    except Exception as e:
+        logger.warning("⚠️ Cache read failed (non-blocking): %s", e)
+        return None
+
+
+def cache_set(key: str, value, ttl: int):
+    """
+    Stores a JSON-serializable value under `key` for `ttl` seconds.
+    Every entry gets a TTL — nothing is cached forever.
+    """
+    try:
+        client = get_redis()
+        if client is not None:
+            client.set(key, json.dumps(value), ex=ttl)
+            return
+
+        now = time.monotonic()
+        with _memory_lock:
+            _memory[key] = (now + ttl, value)
+            _memory.move_to_end(key)
+            _trim_memory(now)
+
+    except Exception as e:
+        logger.warning("⚠️ Cache write failed (non-blocking): %s", e)
+
+
+def _trim_memory(now: float):
+    """
+    Drops expired entries (at most every MEMORY_SWEEP_INTERVAL, or when
+    full), then evicts least recently used ones past MEMORY_CACHE_MAXSIZE.
+    Caller holds _memory_lock.
+    """
+    global _memory_swept_at
+
+    if (
+        len(_memory) > MEMORY_CACHE_MAXSIZE
+        or now - _memory_swept_at >= MEMORY_SWEEP_INTERVAL
+    ):
+        _memory_swept_at = now
+        for key in [k for k, (expires_at, _) in _memory.items() if expires_at <= now]:
+            del _memory[key]
+
+    while len(_memory) > MEMORY_CACHE_MAXSIZE:
+        _memory.popitem(last=False)
+
+
+def cache_delete(*keys: str):
+    """
+    Invalidates one or more keys (write paths call this after Airtable writes).
+    """
+    keys = [k for k in keys if k]
+    if not keys:
+        return
+
+    try:
+        client = get_redis()
+        if client is not None:
+            client.delete(*keys)
+            return
+
+        with _memory_lock:
+            for key in keys:
+                _memory.pop(key, None)
+
+    except Exception as e:
+        logger.warning("⚠️ Cache invalidation failed (non-blocking): %s", e)
+
+
+def cache_delete_prefix(prefix: str):
+    """
+    Invalidates every key starting with `prefix` (e.g. all cached list
+    queries after a write). Redis: SCAN + DEL in chunks, never KEYS.
+    """
+    if not prefix:
+        return
+
+    try:
+        client = get_redis()
+        if client is not None:
+            chunk = []
+            for key in client.scan_iter(match=f"{prefix}*", count=500):
+                chunk.append(key)
+                if len(chunk) >= 500:
+                    client.delete(*chunk)
+                    chunk = []
+            if chunk:
+                client.delete(*chunk)
+            return
+
+        with _memory_lock:
+            for key in [k for k in _memory if k.startswith(prefix)]:
+                _memory.pop(key, None)
+
+    except Exception as e:
+        logger.warning("⚠️ Cache prefix invalidation failed (non-blocking): %s", e)
+
+
+def cached(key: str, ttl: int, loader):
+    """
+    Cache-aside read: serve `key` from cache, otherwise call `loader()`,
+    store its result for `ttl` seconds and return it.
+    """
+    value = cache_get(key)
+    if value is not None:
+        return value
+
+    value = loader()
+    cache_set(key, value, ttl)
+    return value
+
+
+# -----------------------------------------------------------
+# ♻️ Stale-while-revalidate
+# -----------------------------------------------------------
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+REFRESH_LOCK_TTL = 30
+
+
+def _acquire_refresh_lock(key: str) -> bool:
+    """
+    Only one worker refreshes a given key at a time (stampede protection).
+    """
+    client = get_redis()
+    if client is not None:
+        return bool(client.set(f"{key}:refreshing", 1, nx=True, ex=REFRESH_LOCK_TTL))
+
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _release_refresh_lock(key: str):
+    try:
+        client = get_redis()
+        if client is not None:
+            client.delete(f"{key}:refreshing")
+            return
+
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+    except Exception as e:
+        logger.warning("⚠️ Cache refresh unlock failed (non-blocking): %s", e)
+
+
+def _store_swr(key: str, value, fresh: int, stale: int):
+    cache_set(key, {"cached_at": time.time(), "value": value}, fresh + stale)
+
+
+def _refresh(key: str, loader, fresh: int, stale: int):
+    try:
+        _store_swr(key, loader(), fresh, stale)
+    except Exception as e:
+        logger.warning("⚠️ Background cache refresh failed (non-blocking): %s", e)
+    finally:
+        _release_refresh_lock(key)
+
+
+def swr_get(key: str, loader, fresh: int, stale: int):
+    """
+    Stale-while-revalidate read.
+
+    - Younger than `fresh` seconds → served from cache
+    - Older (but within `fresh + stale`) → served from cache, and a
+      background refresh is started (one per key across workers)
+    - Missing → `loader()` runs inline and the result is cached
+    """
+    entry = cache_get(key)
+
+    if entry is not None:
+        age = time.time() - entry.get("cached_at", 0)
+        try:
+            if age > fresh and _acquire_refresh_lock(key):
+                threading.Thread(
+                    target=_refresh,
+                    args=(key, loader, fresh, stale),
+                    daemon=True,
+                ).start()
+        except Exception as e:
+            logger.warning("⚠️ Cache refresh scheduling failed (non-blocking): %s", e)
+
+        return entry.get("value")
+
+    value = loader()
+    _store_swr(key, value, fresh, stale)
+    return value
+
+
+# -----------------------------------------------------------
+# 🛬 Single-flight (coalesce concurrent identical loads)
+# -----------------------------------------------------------
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def single_flight(key: str, loader):
+    """
+    Runs `loader()` once per `key` at a time within this process:
+    concurrent callers with the same key wait for the first call and
+    share its result (or its exception).
+    """
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = {"done": threading.Event()}
+
+    if not leader:
+        flight["done"].wait()
+        if "error" in flight:
+            raise flight["error"]
+        return flight["value"]
+
+    try:
+        flight["value"] = loader()
+        return flight["value"]
+    except BaseException as e:
+        flight["error"] = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight["done"].set()
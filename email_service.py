@@ -1,4 +1,5 @@
 import os
+import logging
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
@@ -12,6 +13,8 @@ EMAIL_FROM_NAME = os.getenv("EMAIL_FROM_NAME", "Closing Report App")
 
 TEST_EMAIL_RECIPIENT = os.getenv("TEST_EMAIL_RECIPIENT", EMAIL_FROM)
 
+logger = logging.getLogger("rops.email")
+
 
 # -----------------------------------------------------------
 # 💰 Helpers
@@ -143,12 +146,14 @@ This is an automated message.
         sg = SendGridAPIClient(SENDGRID_API_KEY)
         response = sg.send(message)
 
-        print(
-            f"📧 Submission email sent | status={response.status_code} | reason={reason}"
+        logger.info(
+            "📧 Submission email sent | status=%s | reason=%s",
+            response.status_code,
+            reason,
         )
 
     except Exception as e:
-        print("⚠️ Submission email failed (non-blocking):", str(e))
+        logger.warning("⚠️ Submission email failed (non-blocking): %s", e)
 
 
 # -----------------------------------------------------------
@@ -295,7 +300,7 @@ This is an automated message.
         sg = SendGridAPIClient(SENDGRID_API_KEY)
         response = sg.send(message)
 
-        print(f"📧 Verification email sent | status={response.status_code}")
+        logger.info("📧 Verification email sent | status=%s", response.status_code)
 
     except Exception as e:
-        print("⚠️ Verification email failed (non-blocking):", str(e))
\ No newline at end of file
+        logger.warning("⚠️ Verification email failed (non-blocking): %s", e)
\ No newline at end of file
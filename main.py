@@ -1,28 +1,86 @@
 import os
-import json
+import atexit
+import logging
+import math
+import re
+import anyio.to_thread
+import orjson
+import time
+import threading
+import queue
+import hmac
+from logging.handlers import QueueHandler, QueueListener
 from datetime import date as dt_date, datetime
 from datetime import timedelta
 from typing import Optional, List, Dict
-from collections import defaultdict
+from collections import ChainMap
+from functools import lru_cache
+from itertools import chain, repeat
+from operator import itemgetter
+from urllib.parse import quote
 
-from fastapi import FastAPI, HTTPException, Query, Request, Path
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from pydantic import BaseModel, Field, RootModel
 from dotenv import load_dotenv
-from pyairtable import Table
-from fastapi import Query
+from pyairtable import Api, Table
+from requests import HTTPError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from email_service import (
     send_closing_submission_email,
     send_closing_verification_email,
 )
+from cache_service import (
+    cache_get,
+    cache_set,
+    cache_delete,
+    cache_delete_prefix,
+    cached,
+    swr_get,
+    single_flight,
+    get_redis,
+)
 
 # -----------------------------------------------------------
 # 🔧 Load environment
 # -----------------------------------------------------------
 load_dotenv()
 
+# -----------------------------------------------------------
+# 🪵 Logging (queued — request threads only enqueue)
+# -----------------------------------------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+logger = logging.getLogger("rops")
+
+def _configure_logging():
+    """
+    Routes the "rops" logger (and its children, e.g. rops.cache) through a
+    QueueHandler; one listener thread per process does the stderr writes.
+    """
+    if logger.handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    listener = QueueListener(log_queue, stream)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+_configure_logging()
+
 # -----------------------------------------------------------
 # 🔐 Load Airtable Credentials
 # -----------------------------------------------------------
@@ -37,7 +95,11 @@ if not AIRTABLE_BASE_ID or not AIRTABLE_API_KEY:
 # -----------------------------------------------------------
 # 🚀 FastAPI App Init
 # -----------------------------------------------------------
-app = FastAPI(title="Daily Sales & Cash Management API", version="1.1.0")
+app = FastAPI(
+    title="Daily Sales & Cash Management API",
+    version="1.1.0",
+    default_response_class=ORJSONResponse,
+)
 
 FRONTEND_URL = "https://restaurant-ops-dashboard-pflorencio.replit.app"
 BACKEND_URL = "https://restaurant-ops-backend.onrender.com"
@@ -48,6 +110,44 @@ origins = [
     "http://127.0.0.1:5000",
 ]
 
+# -----------------------------------------------------------
+# ✈️ OPTIONS short-circuit (pure ASGI — no routing / JSONResponse per call)
+# -----------------------------------------------------------
+class CorsPreflightShortCircuit:
+    """
+    Answers any OPTIONS request with a prebuilt response.
+
+    Registered before CORSMiddleware, so it sits inside it: real CORS
+    preflights are still answered by CORSMiddleware for the allowed
+    origins, and only the remaining OPTIONS calls land here.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._body = b'{"ok":true}'
+        self._headers = [
+            (b"access-control-allow-origin", FRONTEND_URL.encode()),
+            (b"access-control-allow-methods", b"GET, POST, PUT, PATCH, DELETE, OPTIONS"),
+            (b"access-control-allow-headers", b"*"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(self._body)).encode()),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "OPTIONS":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": self._headers,
+            })
+            await send({"type": "http.response.body", "body": self._body})
+            return
+
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(CorsPreflightShortCircuit)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -58,61 +158,216 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Readable by the dashboard on /reports/daily-summary?as_text=true
+    expose_headers=["X-Business-Date", "X-Store"],
+)
+
+# Dashboard payloads (raw Airtable fields) compress well — gzip anything > 1 KB
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# -----------------------------------------------------------
+# 🧵 Threadpool size (sync handlers block a thread per Airtable call)
+# -----------------------------------------------------------
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "100"))
+
+@app.on_event("startup")
+async def configure_threadpool():
+    """
+    Raises AnyIO's default 40-thread limit so more concurrent requests can
+    wait on Airtable at once (the rate limiter still paces outbound calls).
+    """
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+# -----------------------------------------------------------
+# 🚦 Airtable rate limit (5 req/s per base)
+# -----------------------------------------------------------
+# Airtable answers 429 (and a 30s penalty) past 5 requests/second per base.
+# Every outbound Airtable call waits for a token first. With Redis the budget
+# is shared by all workers; otherwise each worker gets rate / WEB_CONCURRENCY.
+AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", "5"))
+AIRTABLE_RATE_BURST = int(os.getenv("AIRTABLE_RATE_BURST", "5"))
+
+
+class _TokenBucket:
+    """Thread-safe token bucket (handlers run in FastAPI's threadpool)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+if get_redis() is None and int(os.getenv("WEB_CONCURRENCY") or 1) > 1:
+    logger.warning(
+        "⚠️ WEB_CONCURRENCY > 1 without REDIS_URL: caches are per worker, so "
+        "other workers can serve stale data until their TTLs expire"
+    )
+
+_local_bucket = _TokenBucket(
+    AIRTABLE_RATE_LIMIT / max(1, int(os.getenv("WEB_CONCURRENCY") or 1)),
+    AIRTABLE_RATE_BURST,
+)
+
+
+def _acquire_airtable_token():
+    """
+    Blocks until an Airtable request may be sent.
+    Redis: fixed one-second window shared across workers (INCR + EXPIRE).
+    """
+    client = get_redis()
+    if client is not None:
+        try:
+            while True:
+                window = int(time.time())
+                key = f"airtable:rate:{AIRTABLE_BASE_ID}:{window}"
+                pipe = client.pipeline()
+                pipe.incr(key)
+                pipe.expire(key, 2)
+                count, _ = pipe.execute()
+
+                if count <= AIRTABLE_RATE_LIMIT:
+                    return
+
+                time.sleep(max(0.0, window + 1 - time.time()))
+        except Exception as e:
+            logger.warning("⚠️ Redis rate limit unavailable, using local bucket: %s", e)
+
+    _local_bucket.acquire()
+
+
+class _RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a rate-limit token before every send."""
+
+    def send(self, request, **kwargs):
+        _acquire_airtable_token()
+        return super().send(request, **kwargs)
+
+
+# Airtable's penalty after a 429 lasts 30 s — retrying sooner just fails again
+AIRTABLE_429_BACKOFF = 30.0
+AIRTABLE_429_RETRIES = 1
+
+
+class _AirtableRetry(Retry):
+    """
+    Retries 429s for every method (Airtable rejected the request, so a
+    write is safe to resend) and 5xx only for idempotent methods.
+
+    urllib3 retries inside a single adapter send(), so every retry takes
+    its own rate-limit token here; a 429 waits out the penalty window
+    (Retry-After, at least AIRTABLE_429_BACKOFF) and is retried once.
+    """
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code == 429:
+            earlier_429s = sum(1 for h in self.history if h.status == 429)
+            return bool(self.total) and earlier_429s < AIRTABLE_429_RETRIES
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def sleep(self, response=None):
+        if response is not None and response.status == 429:
+            retry_after = self.get_retry_after(response) or 0
+            time.sleep(max(retry_after, AIRTABLE_429_BACKOFF))
+        else:
+            super().sleep(response)
+        _acquire_airtable_token()
+
+
+AIRTABLE_RETRY = _AirtableRetry(
+    total=3,
+    backoff_factor=0.2,
+    status_forcelist=[429, 500, 502, 503, 504],
 )
 
-# Generic OPTIONS for preflight
-@app.options("/{rest_of_path:path}")
-async def options_handler(request: Request, rest_of_path: str):
-    response = JSONResponse({"ok": True})
-    response.headers["Access-Control-Allow-Origin"] = FRONTEND_URL
-    response.headers["Access-Control-Allow-Methods"] = (
-        "GET, POST, PUT, PATCH, DELETE, OPTIONS"
+# -----------------------------------------------------------
+# 🔌 Shared Airtable client (one keep-alive session per process)
+# -----------------------------------------------------------
+_AIRTABLE_API = Api(AIRTABLE_API_KEY, retry_strategy=AIRTABLE_RETRY)
+
+for _scheme in ("https://", "http://"):
+    _AIRTABLE_API.session.mount(
+        _scheme,
+        _RateLimitedAdapter(
+            pool_connections=16, pool_maxsize=64, max_retries=AIRTABLE_RETRY
+        ),
     )
-    response.headers["Access-Control-Allow-Headers"] = "*"
-    return response
 
 # -----------------------------------------------------------
 # 🔗 Airtable Helpers (STRICT mode using IDs)
 # -----------------------------------------------------------
-def _airtable_table(table_key: str) -> Table:
+_TABLE_CONFIGS = {
+    "daily_closing": {
+        "id_env": "AIRTABLE_DAILY_CLOSINGS_TABLE_ID",
+        "default_name": "Daily Closing",
+    },
+    "history": {
+        "id_env": "AIRTABLE_HISTORY_TABLE_ID",
+        "default_name": "Daily Closing History",
+    },
+    "stores": {
+        "id_env": "AIRTABLE_STORES_TABLE_ID",
+        "default_name": "Stores",
+    },
+    "users": {
+        "id_env": "AIRTABLE_USERS_TABLE_ID",
+        "default_name": "Users",
+    },
+    "weekly_budgets": {
+        "id_env": "AIRTABLE_WEEKLY_BUDGETS_TABLE_ID",
+        "default_name": "Weekly Budgets",
+    },
+}
+
+# Table IDs read from the environment once, at import
+TABLE_IDS = {
+    key: os.getenv(cfg["id_env"]) for key, cfg in _TABLE_CONFIGS.items()
+}
+
+def _load_table_config(table_key: str) -> tuple:
     """
-    Centralized Airtable table resolver.
+    Resolves (base_id, table_id) for a table key.
     Uses table IDs only (safe for production).
     """
-
-    table_configs = {
-        "daily_closing": {
-            "id_env": "AIRTABLE_DAILY_CLOSINGS_TABLE_ID",
-            "default_name": "Daily Closing",
-        },
-        "history": {
-            "id_env": "AIRTABLE_HISTORY_TABLE_ID",
-            "default_name": "Daily Closing History",
-        },
-        "stores": {
-            "id_env": "AIRTABLE_STORES_TABLE_ID",
-            "default_name": "Stores",
-        },
-        "users": {
-            "id_env": "AIRTABLE_USERS_TABLE_ID",
-            "default_name": "Users",
-        },
-        "weekly_budgets": {
-            "id_env": "AIRTABLE_WEEKLY_BUDGETS_TABLE_ID",
-            "default_name": "Weekly Budgets",
-        },
-    }
-
-    if table_key not in table_configs:
+    if table_key not in _TABLE_CONFIGS:
         raise RuntimeError(f"Unknown table key: {table_key}")
 
-    cfg = table_configs[table_key]
-    table_id = os.getenv(cfg["id_env"])
+    cfg = _TABLE_CONFIGS[table_key]
+    table_id = TABLE_IDS[table_key]
 
     if not table_id:
         raise RuntimeError(f"Missing table ID for {table_key} → {cfg['id_env']}")
 
-    return Table(AIRTABLE_API_KEY, AIRTABLE_BASE_ID, table_id)
+    return AIRTABLE_BASE_ID, table_id
+
+@lru_cache(maxsize=16)
+def _airtable_table(table_key: str) -> Table:
+    """
+    Centralized Airtable table resolver.
+
+    Memoized: each Table is built once per process. All tables share
+    _AIRTABLE_API's pooled session, so Airtable connections stay alive.
+    """
+    base_id, table_id = _load_table_config(table_key)
+    return _AIRTABLE_API.table(base_id, table_id)
 
 def parse_airtable_date(value: str) -> dt_date:
     """
@@ -126,6 +381,29 @@ def parse_airtable_date(value: str) -> dt_date:
         value.replace("Z", "")
     ).date()
 
+def iso_now() -> str:
+    """
+    Local timestamp (second precision) used for audit columns.
+    Call once per mutation and reuse, so every row written by the
+    same request carries the same timestamp.
+    """
+    return datetime.now().isoformat(timespec="seconds")
+
+def get_record_or_404(table: Table, record_id: str) -> dict:
+    """
+    table.get that turns Airtable's 404 into HTTPException(404).
+    """
+    try:
+        record = table.get(record_id)
+    except Exception as e:
+        if getattr(getattr(e, "response", None), "status_code", None) == 404:
+            raise HTTPException(status_code=404, detail="Record not found")
+        raise
+
+    if not record:
+        raise HTTPException(status_code=404, detail="Record not found")
+    return record
+
 # -----------------------------------------------------------
 # TABLE KEYS (single source of truth)
 # -----------------------------------------------------------
@@ -140,6 +418,7 @@ WEEKLY_BUDGETS_TABLE = "weekly_budgets"
 # 🧩 Backward-compat Airtable Table Aliases (for older routes)
 # -----------------------------------------------------------
 DAILY_CLOSINGS = _airtable_table(DAILY_CLOSINGS_TABLE)
+AIRTABLE_USERS = _airtable_table(USERS_TABLE)
 
 # -----------------------------------------------------------
 # 🧠 Tenant Helpers
@@ -149,25 +428,202 @@ DEFAULT_TENANT_ID = os.getenv("DEFAULT_TENANT_ID", "demo-tenant")
 def resolve_tenant_id(explicit: Optional[str]) -> str:
     return explicit or DEFAULT_TENANT_ID
 
+# Apostrophes (curly + straight) removed in a single translate pass
+_STORE_STRIP = str.maketrans("", "", "’‘'")
+
+@lru_cache(maxsize=1024)
 def normalize_store_value(store: Optional[str]) -> str:
-    return (
-        (store or "")
-        .lower()
-        .strip()
-        .replace("’", "")
-        .replace("‘", "")
-        .replace("'", "")
+    return (store or "").lower().strip().translate(_STORE_STRIP)
+
+# -----------------------------------------------------------
+# 📅 Date filter formula (business_date is concatenated, so validate first)
+# -----------------------------------------------------------
+_BUSINESS_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Optional text formula column (DATETIME_FORMAT({Date},'YYYY-MM-DD')) present
+# in both Daily Closing and History, e.g. "Date ISO". When set, date filters
+# become a plain string compare instead of a per-row DATETIME_PARSE.
+DATE_KEY_FIELD = os.getenv("AIRTABLE_DATE_KEY_FIELD")
+
+if DATE_KEY_FIELD:
+    _DATE_FORMULA_HEAD = "{" + DATE_KEY_FIELD + "}='"
+    _DATE_FORMULA_TAIL = "'"
+else:
+    _DATE_FORMULA_HEAD = "IS_SAME({Date}, DATETIME_PARSE('"
+    _DATE_FORMULA_TAIL = "', 'YYYY-MM-DD'), 'day')"
+
+def _escape_formula_str(value: str) -> str:
+    """
+    Escapes a value for a single-quoted Airtable formula string
+    (backslashes first, then quotes) — e.g. Nonie's → Nonie\\'s.
+    """
+    return str(value).replace("\\", "\\\\").replace("'", "\\'")
+
+def _date_formula(business_date: str) -> str:
+    """
+    Date filter clause (IS_SAME on {Date}, or equality on DATE_KEY_FIELD).
+    Rejects anything that is not YYYY-MM-DD (400) so query params cannot
+    inject formula text.
+    """
+    if not _BUSINESS_DATE_RE.fullmatch(business_date or ""):
+        raise HTTPException(400, "business_date must be YYYY-MM-DD.")
+    return _DATE_FORMULA_HEAD + business_date + _DATE_FORMULA_TAIL
+
+@lru_cache(maxsize=256)
+def _formula_store_date(
+    norm_store: Optional[str], business_date: Optional[str]
+) -> Optional[str]:
+    """
+    Canonical closing filter on {Store Normalized} + business date.
+    `norm_store` must already be normalize_store_value()'d; either part may
+    be omitted (None when both are).
+    """
+    store_clause = (
+        f"{{Store Normalized}}='{_escape_formula_str(norm_store)}'"
+        if norm_store
+        else None
     )
 
+    if business_date and store_clause:
+        return f"AND({_date_formula(business_date)},{store_clause})"
+    if business_date:
+        return _date_formula(business_date)
+    return store_clause
+
+# -----------------------------------------------------------
+# 🗄️ Cache keys + TTLs (see cache_service.py)
+# -----------------------------------------------------------
+# Every key lives under the deployment's tenant, so tenants sharing one
+# Redis never read each other's entries and prefix invalidation (SCAN)
+# only walks this tenant's keys.
+CACHE_NAMESPACE = f"t:{DEFAULT_TENANT_ID}:"
+
+STORES_CACHE_KEY = CACHE_NAMESPACE + "stores:active"
+USERS_CACHE_KEY = CACHE_NAMESPACE + "users:active"
+
+STORES_CACHE_TTL = 300
+USERS_CACHE_TTL = 300
+CLOSING_CACHE_TTL = 60
+# "No closing yet" answers are polled hardest (cashier form open all day)
+# but turn stale as soon as one is created outside this API — keep short.
+CLOSING_EMPTY_CACHE_TTL = 5
+
+# Stale-while-revalidate window: after the TTL above, keep serving the
+# cached copy for this long while a background refresh runs.
+STALE_CACHE_WINDOW = 600
+
+def closing_cache_key(
+    business_date: str,
+    store_id: Optional[str] = None,
+    store_name: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Cache key for a single store + date closing (/closings/unique).
+    Keyed by linked Store ID when known, else by normalized store name.
+    """
+    if store_id:
+        return f"{CACHE_NAMESPACE}closing:{store_id}:{business_date}"
+    if store_name:
+        return f"{CACHE_NAMESPACE}closing:n:{normalize_store_value(store_name)}:{business_date}"
+    return None
+
+# Short-lived caches for dashboard list polls (/closings, /history,
+# /reports/daily-summary). Keys share a prefix per endpoint so writes can
+# drop them wholesale.
+LIST_CACHE_TTL = 15
+SUMMARY_CACHE_TTL = 60  # summary aggregates change only on closing writes
+CLOSINGS_LIST_PREFIX = CACHE_NAMESPACE + "reads:closings:"
+HISTORY_LIST_PREFIX = CACHE_NAMESPACE + "reads:history:"
+SUMMARY_PREFIX = CACHE_NAMESPACE + "reads:summary:"
+
+def list_cache_key(prefix: str, *parts) -> str:
+    return prefix + ":".join("" if p is None else str(p) for p in parts)
+
+def invalidate_closing_cache(fields: dict):
+    """
+    Drop cached /closings/unique entries for a closing record
+    (both the Store ID and store-name keyed variants), plus the cached
+    /closings and /reports/daily-summary lists.
+    """
+    cache_delete_prefix(CLOSINGS_LIST_PREFIX)
+    cache_delete_prefix(SUMMARY_PREFIX)
+
+    f = fields or {}
+    business_date = str(f.get("Date") or "")[:10]
+    if not business_date:
+        return
+
+    keys = []
+    store_ids = f.get("Store")
+    if isinstance(store_ids, list):
+        keys += [closing_cache_key(business_date, store_id=sid) for sid in store_ids]
+    elif store_ids:
+        keys.append(closing_cache_key(business_date, store_name=store_ids))
+
+    for name_field in ("Store Normalized", "Store Name"):
+        name = f.get(name_field)
+        if isinstance(name, list):
+            name = name[0] if name else None
+        if name:
+            keys.append(closing_cache_key(business_date, store_name=name))
+
+    cache_delete(*keys)
+
 def monday_of_week(d: dt_date) -> dt_date:
     return d - timedelta(days=d.weekday())
 
+# Only columns food_spend_from_fields reads (projection for budget sums)
+FOOD_SPEND_FIELDS = ["Kitchen Budget", "Bar Budget"]
+
+
 def food_spend_from_fields(fields: dict) -> float:
     return (
         float(fields.get("Kitchen Budget", 0) or 0)
         + float(fields.get("Bar Budget", 0) or 0)
     )
 
+# store_id -> display name. Filled by /stores and by lookups below, so
+# history rows and closing lookups rarely need a Stores GET.
+STORE_NAME_CACHE: Dict[str, str] = {}
+
+# The whole Stores table is tiny: load id → name once, refresh every 10 min
+STORE_INDEX_TTL = 600
+STORE_INDEX_RETRY = 30  # after a failed load, back off before retrying
+_store_index_loaded_at = float("-inf")
+_store_index_lock = threading.Lock()
+
+def get_store_index() -> Dict[str, str]:
+    """
+    Stores record ID → display name ("Store"), prefetched in one request
+    and refreshed after STORE_INDEX_TTL. Best effort — on Airtable errors
+    the previous index is kept.
+    """
+    global STORE_NAME_CACHE, _store_index_loaded_at
+
+    if time.monotonic() - _store_index_loaded_at < STORE_INDEX_TTL:
+        return STORE_NAME_CACHE
+
+    with _store_index_lock:
+        now = time.monotonic()
+        if now - _store_index_loaded_at < STORE_INDEX_TTL:
+            return STORE_NAME_CACHE
+
+        try:
+            records = _airtable_table(STORES_TABLE).all(
+                fields=["Store"], page_size=100
+            )
+            STORE_NAME_CACHE = {
+                rec["id"]: rec["fields"]["Store"]
+                for rec in records
+                if rec.get("fields", {}).get("Store")
+            }
+            _store_index_loaded_at = now
+        except Exception as e:
+            logger.warning("⚠️ Store index refresh failed: %s", e)
+            _store_index_loaded_at = now - STORE_INDEX_TTL + STORE_INDEX_RETRY
+
+    return STORE_NAME_CACHE
+
 def resolve_store_display_name(store_id: str) -> str:
     """
     Resolve Airtable Stores record ID -> display name used in linked record fields.
@@ -176,24 +632,32 @@ def resolve_store_display_name(store_id: str) -> str:
     if not store_id:
         return ""
 
+    cached_name = get_store_index().get(store_id)
+    if cached_name:
+        return cached_name
+
+    # Not in the index (e.g. store added since the last refresh)
     try:
         stores_table = _airtable_table(STORES_TABLE)
         rec = stores_table.get(store_id) or {}
         f = rec.get("fields", {}) or {}
         # ✅ Your codebase consistently uses "Store" as the store name field
-        return (
+        name = (
             f.get("Store")
             or f.get("Store Name")
             or f.get("Name")
             or ""
         )
+        if name:
+            STORE_NAME_CACHE[store_id] = name
+        return name
     except Exception as e:
-        print("⚠️ resolve_store_display_name failed:", e)
+        logger.warning("⚠️ resolve_store_display_name failed: %s", e)
         return ""
 
 def get_all_store_ids():
     stores_table = _airtable_table("stores")
-    records = stores_table.all()
+    records = stores_table.all(fields=["Store"])
     return [r["id"] for r in records]
 # -----------------------------------------------------------
 # 🧠 Shared User Validation Logic
@@ -285,6 +749,13 @@ class VerifyPayload(BaseModel):
     verified_by: str
 
 
+class BulkVerifyPayload(BaseModel):
+    record_ids: List[str] = Field(..., min_length=1, max_length=200)
+    status: str
+    verified_by: str
+    notes: Optional[str] = None
+
+
 class ClosingUpdate(RootModel[Dict]):
     """
     Simple wrapper to accept an arbitrary JSON object for PATCH.
@@ -333,22 +804,21 @@ def healthz():
     return {"ok": True}
 
 
+AIRTABLE_TABLE_NAME = os.getenv("AIRTABLE_TABLE_NAME")
+
 @app.get("/airtable/test")
 def airtable_test():
     """
     Quick connectivity test using AIRTABLE_TABLE_NAME (optional).
     """
-    base_id = os.getenv("AIRTABLE_BASE_ID")
-    api_key = os.getenv("AIRTABLE_API_KEY")
-    table_name = os.getenv("AIRTABLE_TABLE_NAME")
-    if not (base_id and api_key and table_name):
+    if not AIRTABLE_TABLE_NAME:
         return {
             "error":
             "Missing AIRTABLE_BASE_ID, AIRTABLE_API_KEY, or AIRTABLE_TABLE_NAME"
         }
 
     try:
-        table = Table(api_key, base_id, table_name)
+        table = _AIRTABLE_API.table(AIRTABLE_BASE_ID, AIRTABLE_TABLE_NAME)
         records = table.all(max_records=3)
         return {"records": [r.get("fields", {}) for r in records]}
     except Exception as e:
@@ -358,7 +828,7 @@ def airtable_test():
 # GET /stores  →  List all active stores
 # ---------------------------------------------------------
 @app.get("/stores")
-async def list_stores():
+def list_stores():
     """
     Returns:
     [
@@ -367,39 +837,39 @@ async def list_stores():
       ...
     ]
     """
-    import requests
+    def load_stores():
+        stores = []
+        records = _airtable_table(STORES_TABLE).all(
+            fields=["Store", "Status"], page_size=100
+        )
+        for rec in records:
+            fields = rec.get("fields", {})
+            if fields.get("Store"):
+                STORE_NAME_CACHE[rec["id"]] = fields["Store"]
 
-    if not AIRTABLE_BASE_ID or not AIRTABLE_API_KEY:
-        raise HTTPException(status_code=500,
-                            detail="Airtable credentials missing")
+            status = fields.get("Status", "")
 
-    url = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/Stores"
-    headers = {"Authorization": f"Bearer {AIRTABLE_API_KEY}"}
+            if isinstance(status, list):
+                status = status[0]
+
+            if str(status).lower() == "active":
+                stores.append({
+                    "id": rec.get("id"),
+                    "name": fields.get("Store", "")
+                })
+        return stores
 
     try:
-        r = requests.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-    except Exception as e:
-        print("🔥 ERROR FETCHING STORES:", e)
+        stores = swr_get(
+            STORES_CACHE_KEY, load_stores, STORES_CACHE_TTL, STALE_CACHE_WINDOW
+        )
+        # Cache hits (e.g. from Redis) skip load_stores — keep names warm
+        STORE_NAME_CACHE.update((s["id"], s["name"]) for s in stores if s.get("name"))
+        return stores
+    except Exception:
+        logger.exception("🔥 ERROR FETCHING STORES")
         raise HTTPException(status_code=500, detail="Failed to fetch stores")
 
-    stores = []
-    for rec in data.get("records", []):
-        fields = rec.get("fields", {})
-        status = fields.get("Status", "")
-
-        if isinstance(status, list):
-            status = status[0]
-
-        if str(status).lower() == "active":
-            stores.append({
-                "id": rec.get("id"),
-                "name": fields.get("Store", "")
-            })
-
-    return stores
-
 # -----------------------------------------------------------
 # WEEKLY BUDGETS (GET)
 # -----------------------------------------------------------
@@ -413,7 +883,7 @@ def get_weekly_budget_raw(store_id: str, business_date: str):
     # ✅ PRIMARY: match by Store ID + Week Start using IS_SAME (date-safe)
     formula_primary = (
         "AND("
-        f"{{Store ID}}='{store_id}',"
+        f"{{Store ID}}='{_escape_formula_str(store_id)}',"
         f"IS_SAME({{Week Start}}, '{week_start}', 'day')"
         ")"
     )
@@ -424,7 +894,7 @@ def get_weekly_budget_raw(store_id: str, business_date: str):
     if not records:
         store_name = resolve_store_display_name(store_id)
         if store_name:
-            safe_store_name = store_name.replace("'", "\\'")
+            safe_store_name = _escape_formula_str(store_name)
             formula_fallback = (
                 "AND("
                 f"FIND('{safe_store_name}', ARRAYJOIN({{Store}})),"
@@ -542,7 +1012,7 @@ def upsert_weekly_budget(payload: dict):
     # -------------------------------
     formula = (
         "AND("
-        f"{{Store ID}}='{store_id}',"
+        f"{{Store ID}}='{_escape_formula_str(store_id)}',"
         f"IS_SAME({{Week Start}}, '{week_start}', 'day')"
         ")"
     )
@@ -673,7 +1143,7 @@ def lock_weekly_budget(payload: dict):
         # Lookup by Store ID + Week Start
         formula = (
             "AND("
-            f"{{Store ID}}='{store_id}',"
+            f"{{Store ID}}='{_escape_formula_str(store_id)}',"
             f"IS_SAME({{Week Start}}, '{week_start}', 'day')"
             ")"
         )
@@ -734,12 +1204,14 @@ def lock_weekly_budget(payload: dict):
         "{Verified Status}='Verified',"
         f"IS_AFTER({{Date}}, {start_guard}),"
         f"IS_BEFORE({{Date}}, {end_guard}),"
-        f"{{Store ID}}='{store_id}'"
+        f"{{Store ID}}='{_escape_formula_str(store_id)}'"
         ")"
     )
 
     try:
-        closing_records = closings_table.all(formula=closings_formula_primary)
+        closing_records = closings_table.all(
+            formula=closings_formula_primary, fields=FOOD_SPEND_FIELDS
+        )
         spent = sum(food_spend_from_fields(r.get("fields", {}) or {}) for r in closing_records)
     except Exception:
         # Fallback: match via store DISPLAY NAME if Store ID isn't available / formula errors
@@ -747,7 +1219,7 @@ def lock_weekly_budget(payload: dict):
         if not store_name:
             raise HTTPException(400, "Could not resolve store name for fallback matching")
 
-        safe_store_name = store_name.replace("'", "\\'")
+        safe_store_name = _escape_formula_str(store_name)
         closings_formula_fallback = (
             "AND("
             "{Verified Status}='Verified',"
@@ -756,7 +1228,9 @@ def lock_weekly_budget(payload: dict):
             f"FIND('{safe_store_name}', ARRAYJOIN({{Store}}))"
             ")"
         )
-        closing_records = closings_table.all(formula=closings_formula_fallback)
+        closing_records = closings_table.all(
+            formula=closings_formula_fallback, fields=FOOD_SPEND_FIELDS
+        )
         spent = sum(food_spend_from_fields(r.get("fields", {}) or {}) for r in closing_records)
 
     remaining = max(0.0, total_budget - float(spent or 0))
@@ -843,7 +1317,7 @@ def get_weekly_budget_history(
 
     formula = (
         "AND("
-        f"{{Store ID}}='{store_id}',"
+        f"{{Store ID}}='{_escape_formula_str(store_id)}',"
         "{Status}='Locked',"
         f"IS_AFTER({{Week Start}}, {start_guard}),"
         f"IS_BEFORE({{Week Start}}, {end_guard})"
@@ -895,7 +1369,7 @@ def get_weekly_budget_history(
 # 📊 Weekly Budget – Read (Frontend)
 # -----------------------------------------------------------
 @app.get("/weekly-budget")
-async def get_weekly_budget(
+def get_weekly_budget(
     store_id: str = Query(...),
     date: str = Query(...)
 ):
@@ -917,7 +1391,7 @@ async def get_weekly_budget(
     if not store_name:
         return {"exists": False, "reason": "Could not resolve store name"}
 
-    safe_store_name = store_name.replace("'", "\\'")
+    safe_store_name = _escape_formula_str(store_name)
 
     formula = (
         "AND("
@@ -955,6 +1429,61 @@ class UserLoginRequest(BaseModel):
     user_id: str
     pin: str
 
+# Airtable view filtered to Active = TRUE (e.g. "Active Users"), optional
+ACTIVE_USERS_VIEW = os.getenv("AIRTABLE_ACTIVE_USERS_VIEW")
+
+# Columns read by the users list (everything else is left on Airtable)
+USER_LIST_FIELDS = [
+    "Name",
+    "PIN",
+    "Role",
+    "Active",
+    "Store Access",
+    "Store (from Store Access)",
+    "Stores",
+    "Store (from Stores)",
+]
+
+def _store_access_list(fields: dict) -> List[dict]:
+    """
+    Pairs Store Access IDs with their lookup names ("" when a name is missing).
+    """
+    access_ids = fields.get("Store Access") or []
+    access_names = fields.get("Store (from Store Access)") or []
+    return [
+        {"id": sid, "name": name}
+        for sid, name in zip(access_ids, chain(access_names, repeat("")))
+    ]
+
+def _primary_store(fields: dict, store_access_list: List[dict]) -> Optional[dict]:
+    """
+    Primary store: linked "Stores" first, else the first Store Access entry.
+    """
+    stores = fields.get("Stores")
+    if isinstance(stores, list) and stores:
+        names = fields.get("Store (from Stores)")
+        return {
+            "id": stores[0],
+            "name": (names or [""])[0] if isinstance(names, list) else names,
+        }
+
+    return store_access_list[0] if store_access_list else None
+
+def _normalize_user(rec_id: Optional[str], fields: dict) -> dict:
+    """
+    User record → payload shared by /auth/users and /auth/user-login.
+    """
+    store_access_list = _store_access_list(fields)
+    return {
+        "user_id": rec_id,
+        "name": fields.get("Name"),
+        "pin": str(fields.get("PIN", "")),
+        "role": str(fields.get("Role", "cashier")).lower(),
+        "active": bool(fields.get("Active")),
+        "store": _primary_store(fields, store_access_list),
+        "store_access": store_access_list,
+    }
+
 @app.get("/auth/users")
 def list_users():
     """
@@ -962,62 +1491,34 @@ def list_users():
     """
 
     try:
-        table = _airtable_table("users")
-
-        records = table.all(formula="{Active}=TRUE()", max_records=200)
-        result = []
-
-        for r in records:
-            fields = r.get("fields", {})
-
-            # ---------------------------------------
-            # Build Store Access (multi-store)
-            # ---------------------------------------
-            store_access_list = []
-            access_ids = fields.get("Store Access") or []
-            access_names = fields.get("Store (from Store Access)") or []
-
-            for i, sid in enumerate(access_ids):
-                store_access_list.append({
-                    "id": sid,
-                    "name": access_names[i] if i < len(access_names) else ""
-                })
-
-            # ---------------------------------------
-            # Determine Primary Store
-            # ---------------------------------------
-            store_obj = None
+        return swr_get(
+            USERS_CACHE_KEY, _load_active_users, USERS_CACHE_TTL, STALE_CACHE_WINDOW
+        )
 
-            # Case 1: "Stores" field contains a linked store
-            if isinstance(fields.get("Stores"), list) and fields["Stores"]:
-                store_obj = {
-                    "id": fields["Stores"][0],
-                    "name": (
-                        fields.get("Store (from Stores)", [""])[0]
-                        if isinstance(fields.get("Store (from Stores)"), list)
-                        else fields.get("Store (from Stores)")
-                    )
-                }
+    except Exception as e:
+        logger.exception("❌ Error in /auth/users")
+        raise HTTPException(status_code=500, detail=str(e))
 
-            # Case 2: fallback — first Store Access
-            if not store_obj and store_access_list:
-                store_obj = store_access_list[0]
 
-            result.append({
-                "user_id": r.get("id"),
-                "name": fields.get("Name"),
-                "pin": str(fields.get("PIN", "")),
-                "role": str(fields.get("Role", "cashier")).lower(),
-                "active": bool(fields.get("Active")),
-                "store": store_obj,
-                "store_access": store_access_list
-            })
+def _load_active_users():
+    """
+    Airtable fetch + normalization behind /auth/users (cached by list_users).
+    """
+    table = _airtable_table("users")
 
-        return result
+    # Pre-filtered view when configured, else evaluate the Active formula
+    if ACTIVE_USERS_VIEW:
+        active_filter = {"view": ACTIVE_USERS_VIEW}
+    else:
+        active_filter = {"formula": "{Active}=TRUE()"}
 
-    except Exception as e:
-        print("❌ Error in /auth/users:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+    records = table.all(
+        **active_filter,
+        fields=USER_LIST_FIELDS,
+        page_size=100,
+        max_records=200,
+    )
+    return [_normalize_user(r.get("id"), r.get("fields", {})) for r in records]
 
 
 @app.post("/auth/user-login")
@@ -1040,57 +1541,24 @@ def user_login(payload: UserLoginRequest):
             raise HTTPException(status_code=401, detail="User is inactive")
 
         # PIN must match
-        stored_pin = str(fields.get("PIN", ""))
-        if payload.pin != stored_pin:
+        stored_pin = str(fields.get("PIN", "")).encode("utf-8")
+        if not hmac.compare_digest(str(payload.pin).encode("utf-8"), stored_pin):
             raise HTTPException(status_code=401, detail="Invalid PIN")
 
         # ---------------------------------------
-        # Build Store Access
-        # ---------------------------------------
-        store_access_list = []
-        access_ids = fields.get("Store Access") or []
-        access_names = fields.get("Store (from Store Access)") or []
-
-        for i, sid in enumerate(access_ids):
-            store_access_list.append({
-                "id": sid,
-                "name": access_names[i] if i < len(access_names) else ""
-            })
-
-        # ---------------------------------------
-        # Determine Primary Store (same logic)
-        # ---------------------------------------
-        store_obj = None
-
-        if isinstance(fields.get("Stores"), list) and fields["Stores"]:
-            store_obj = {
-                "id": fields["Stores"][0],
-                "name": (
-                    fields.get("Store (from Stores)", [""])[0]
-                    if isinstance(fields.get("Store (from Stores)"), list)
-                    else fields.get("Store (from Stores)")
-                )
-            }
-
-        if not store_obj and store_access_list:
-            store_obj = store_access_list[0]
-
-        # ---------------------------------------
-        # Return login payload
+        # Return login payload (no PIN / active flag)
         # ---------------------------------------
+        user = _normalize_user(record.get("id"), fields)
         return {
-            "user_id": record.get("id"),
-            "name": fields.get("Name"),
-            "role": str(fields.get("Role", "cashier")).lower(),
-            "store": store_obj,
-            "store_access": store_access_list
+            key: user[key]
+            for key in ("user_id", "name", "role", "store", "store_access")
         }
 
     except HTTPException:
         raise
 
     except Exception as e:
-        print("❌ Error in /auth/user-login:", e)
+        logger.exception("❌ Error in /auth/user-login")
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------------------------------------
@@ -1190,6 +1658,7 @@ def update_user(user_id: str, payload: UserUpdate):
         # Update Airtable
         # ---------------------------------------------------
         updated = table.update(user_id, update_fields)
+        cache_delete(USERS_CACHE_KEY)
 
         return {
             "status": "updated",
@@ -1199,8 +1668,8 @@ def update_user(user_id: str, payload: UserUpdate):
 
     except HTTPException:
         raise
-    except Exception as e:
-        print("❌ Update user error:", e)
+    except Exception:
+        logger.exception("❌ Update user error")
         raise HTTPException(
             status_code=500,
             detail="Failed to update user",
@@ -1267,6 +1736,7 @@ def create_user(payload: UserCreate):
             fields["Store Access"] = all_stores
 
         created = table.create(fields)
+        cache_delete(USERS_CACHE_KEY)
 
         return {
             "status": "created",
@@ -1276,13 +1746,25 @@ def create_user(payload: UserCreate):
 
     except HTTPException:
         raise
-    except Exception as e:
-        print("❌ Create user error:", e)
+    except Exception:
+        logger.exception("❌ Create user error")
         raise HTTPException(
             status_code=500,
             detail="Failed to create user",
         )
 
+# ---------------------------------------------------------
+# POST /admin/users/refresh  →  Drop the cached user list
+# ---------------------------------------------------------
+@app.post("/admin/users/refresh")
+def refresh_users_cache():
+    """
+    Invalidates the cached /auth/users list (e.g. after users were edited
+    directly in Airtable). The next request reloads it.
+    """
+    cache_delete(USERS_CACHE_KEY)
+    return {"status": "refreshed"}
+
 # ---------------------------------------------------------
 # GET /admin/roles-metadata  →  Role rules + helper text
 # ---------------------------------------------------------
@@ -1322,7 +1804,7 @@ async def get_roles_metadata():
 # GET /admin/users  →  List users for Users & Access table
 # ---------------------------------------------------------
 @app.get("/admin/users")
-async def admin_list_users():
+def admin_list_users():
     """
     Returns all users in Airtable with normalized fields for the frontend table.
     """
@@ -1334,14 +1816,7 @@ async def admin_list_users():
             f = r.get("fields", {}) or {}
 
             # Build Store Access list
-            access_ids = f.get("Store Access") or []
-            access_names = f.get("Store (from Store Access)") or []
-            store_access_list = []
-            for i, sid in enumerate(access_ids):
-                store_access_list.append({
-                    "id": sid,
-                    "name": access_names[i] if i < len(access_names) else ""
-                })
+            store_access_list = _store_access_list(f)
 
             # Primary store (your existing convention uses "Stores")
             store_obj = None
@@ -1371,25 +1846,14 @@ async def admin_list_users():
 
         return users
 
-    except Exception as e:
-        print("❌ Error in GET /admin/users:", e)
+    except Exception:
+        logger.exception("❌ Error in GET /admin/users")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
 
 # -----------------------------------------------------------
 # 📝 History logger
 # -----------------------------------------------------------
-def _safe_serialize(obj):
-    if isinstance(obj, (datetime, dt_date)):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: _safe_serialize(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_safe_serialize(v) for v in obj]
-    if isinstance(obj, tuple):
-        return tuple(_safe_serialize(v) for v in obj)
-    return obj
-
-def _log_history(
+def _history_payload(
     *,
     action: str,
     store: Optional[str],
@@ -1400,342 +1864,827 @@ def _log_history(
     lock_status: Optional[str] = None,
     changed_fields: Optional[List[str]] = None,
     tenant_id: Optional[str] = None,
-):
-    try:
-        history_table = _airtable_table(HISTORY_TABLE)
+    timestamp: Optional[str] = None,
+) -> dict:
+    """
+    Builds one Daily Closing History row (Airtable fields).
+    """
+    # Resolve store name safely (linked or text)
+    store_name = store or ""
+    snap = fields_snapshot or {}
 
-        # Resolve store name safely (linked or text)
-        store_name = store or ""
-        snap = fields_snapshot or {}
+    # If store is a linked-record list, resolve name
+    store_ids = snap.get("Store")
+    if isinstance(store_ids, list) and store_ids:
+        store_name = resolve_store_display_name(store_ids[0]) or store_name
 
-        # If store is a linked-record list, resolve name
-        store_ids = snap.get("Store")
-        if isinstance(store_ids, list) and store_ids:
-            try:
-                stores_table = _airtable_table(STORES_TABLE)
-                store_rec = stores_table.get(store_ids[0])
-                store_name = store_rec.get("fields", {}).get("Store") or store_name
-            except Exception as e:
-                print("⚠️ History store resolve failed:", e)
+    if not store_name:
+        store_name = (
+            snap.get("Store Name")
+            or snap.get("Store Display")
+            or snap.get("Store Normalized")
+            or snap.get("Store")
+            or "Unknown"
+        )
 
-        if not store_name:
-            store_name = (
-                snap.get("Store Name")
-                or snap.get("Store Display")
-                or snap.get("Store Normalized")
-                or snap.get("Store")
-                or "Unknown"
-            )
+    normalized = normalize_store_value(store_name)
 
-        normalized = normalize_store_value(store_name)
-
-        payload = {
-            "Date": business_date,
-            "Store": store_name,
-            "Store Normalized": normalized,
-            "Tenant ID": tenant_id or DEFAULT_TENANT_ID,
-            "Action": action,
-            "Changed By": submitted_by,
-            "Timestamp": datetime.now().isoformat(),
-            "Record ID": record_id,
-            "Lock Status": lock_status,
-            "Changed Fields": ", ".join(changed_fields) if changed_fields else None,
-            "Snapshot": json.dumps(_safe_serialize(snap), ensure_ascii=False),
-        }
+    return {
+        "Date": business_date,
+        "Store": store_name,
+        "Store Normalized": normalized,
+        "Tenant ID": tenant_id or DEFAULT_TENANT_ID,
+        "Action": action,
+        "Changed By": submitted_by,
+        "Timestamp": timestamp or iso_now(),
+        "Record ID": record_id,
+        "Lock Status": lock_status,
+        "Changed Fields": ", ".join(changed_fields) if changed_fields else None,
+        # orjson encodes datetime/date natively and emits UTF-8 directly
+        "Snapshot": orjson.dumps(snap, default=str).decode(),
+    }
 
-        history_table.create(payload)
+def _log_history_batch(entries: List[dict]):
+    """
+    Writes history rows with batched creates (10 records per Airtable
+    request). Each entry holds the keyword arguments of _history_payload.
+    Best effort — never fails the caller.
+    """
+    if not entries:
+        return
 
+    try:
+        _write_history_rows(entries)
     except Exception as e:
-        print("⚠️ Failed to log history:", e)
+        logger.warning("⚠️ Failed to log history batch: %s", e)
 
-# -----------------------------------------------------------
-# 📌 UPSERT — Create or Update + Lock
-# -----------------------------------------------------------
-@app.post("/closings")
-def upsert_closing(payload: ClosingCreate):
+def _write_history_rows(entries: List[dict]):
     """
-    Create or update a daily closing record in Airtable.
-    Prefers store_id (linked Store) but still accepts store name for compatibility.
+    batch_create for history entries; raises on Airtable errors.
     """
+    if not entries:
+        return
 
-    try:
-        table = _airtable_table(DAILY_CLOSINGS_TABLE)
+    history_table = _airtable_table(HISTORY_TABLE)
+    history_table.batch_create(
+        [_history_payload(**e) for e in entries], typecast=True
+    )
+    cache_delete_prefix(HISTORY_LIST_PREFIX)
 
-        # -----------------------------------------
-        # Extract incoming values
-        # -----------------------------------------
-        store_id = (payload.store_id or "").strip()
-        store_name = (payload.store or "").strip()
-        business_date = payload.business_date.isoformat()
+# -----------------------------------------------------------
+# 📬 History queue (background batch flusher)
+# -----------------------------------------------------------
+# Handlers enqueue history entries and return; one writer thread flushes
+# them with batch_create — up to 10 rows per request, or whatever arrived
+# within HISTORY_FLUSH_INTERVAL of the first one.
+HISTORY_QUEUE: "queue.Queue" = queue.Queue(maxsize=10_000)
+HISTORY_BATCH_SIZE = 10
+HISTORY_FLUSH_INTERVAL = 0.25  # seconds
+
+_HISTORY_STOP = object()
+_history_thread: Optional[threading.Thread] = None
+_history_writer_lock = threading.Lock()
+
+def _history_writer():
+    stopping = False
+
+    while not stopping:
+        item = HISTORY_QUEUE.get()
+        if item is _HISTORY_STOP:
+            break
+
+        batch = [item]
+        deadline = time.monotonic() + HISTORY_FLUSH_INTERVAL
+
+        while len(batch) < HISTORY_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = HISTORY_QUEUE.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _HISTORY_STOP:
+                stopping = True
+                break
+            batch.append(item)
 
-        # ✅ NEW: Closing Notes (Cashier)
-        closing_notes = getattr(payload, "closing_notes", None)
+        _log_history_batch(batch)
 
-        # -----------------------------------------
-        # Resolve tenant
-        # -----------------------------------------
-        tenant_id = resolve_tenant_id(getattr(payload, "tenant_id", None))
+    # Drain whatever is left after the stop marker
+    leftover = []
+    while True:
+        try:
+            item = HISTORY_QUEUE.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _HISTORY_STOP:
+            leftover.append(item)
+    _log_history_batch(leftover)
+
+# -----------------------------------------------------------
+# 🌊 History stream (optional, Redis)
+# -----------------------------------------------------------
+# With HISTORY_STREAM set (and Redis configured), entries go to a Redis
+# Stream instead of the in-process queue: they survive a worker restart,
+# and one consumer group spreads the Airtable writes across workers.
+# Entries are acked only after batch_create succeeds; failed ones stay
+# pending and are reclaimed after HISTORY_STREAM_RECLAIM_MS.
+HISTORY_STREAM = os.getenv("HISTORY_STREAM")  # e.g. "history:stream"
+HISTORY_STREAM_GROUP = "history-writers"
+HISTORY_STREAM_BLOCK_MS = 1000
+HISTORY_STREAM_RECLAIM_MS = 60_000
+# Entries that keep failing are moved to "<stream>:dead" after this many tries
+HISTORY_STREAM_MAX_DELIVERIES = 5
+
+_history_stream_stop = threading.Event()
+_history_stream_thread: Optional[threading.Thread] = None
+
+def _history_stream_client():
+    return get_redis() if HISTORY_STREAM else None
+
+def _history_stream_batch(client, consumer: str):
+    """
+    Next batch for this consumer: stale pending entries first (left by a
+    failed flush or a dead worker), then new ones.
+    """
+    try:
+        _, claimed, *_ = client.xautoclaim(
+            HISTORY_STREAM,
+            HISTORY_STREAM_GROUP,
+            consumer,
+            min_idle_time=HISTORY_STREAM_RECLAIM_MS,
+            count=HISTORY_BATCH_SIZE,
+        )
+    except Exception:
+        claimed = []  # XAUTOCLAIM needs Redis 6.2+
+
+    if claimed:
+        return claimed
+
+    response = client.xreadgroup(
+        HISTORY_STREAM_GROUP,
+        consumer,
+        {HISTORY_STREAM: ">"},
+        count=HISTORY_BATCH_SIZE,
+        block=HISTORY_STREAM_BLOCK_MS,
+    )
+    return response[0][1] if response else []
+
+def _history_stream_deliveries(client, message_id) -> int:
+    pending = client.xpending_range(
+        HISTORY_STREAM, HISTORY_STREAM_GROUP, min=message_id, max=message_id, count=1
+    )
+    return pending[0]["times_delivered"] if pending else 0
+
+def _write_history_stream_rows_singly(client, payloads: list) -> list:
+    """
+    Writes stream entries one at a time after a failed batch. Returns the
+    message IDs that are done: written, or moved to the dead-letter stream
+    after HISTORY_STREAM_MAX_DELIVERIES attempts. The rest stay pending.
+    """
+    done = []
+    for message_id, raw in payloads:
+        try:
+            _write_history_rows([orjson.loads(raw)])
+            done.append(message_id)
+            continue
+        except Exception as e:
+            error = str(e)
+
+        try:
+            if _history_stream_deliveries(client, message_id) < HISTORY_STREAM_MAX_DELIVERIES:
+                continue
+            client.xadd(
+                f"{HISTORY_STREAM}:dead",
+                {"payload": raw, "error": error[:500]},
+                maxlen=10_000,
+                approximate=True,
+            )
+            logger.error("❌ History entry %s dead-lettered: %s", message_id, error)
+            done.append(message_id)
+        except Exception as e:
+            logger.warning("⚠️ History dead-letter check failed: %s", e)
+
+    return done
+
+def _history_stream_consumer():
+    client = _history_stream_client()
+    consumer = f"{os.uname().nodename}-{os.getpid()}"
+
+    try:
+        client.xgroup_create(
+            HISTORY_STREAM, HISTORY_STREAM_GROUP, id="0", mkstream=True
+        )
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            logger.warning("⚠️ History stream group setup failed: %s", e)
+
+    while not _history_stream_stop.is_set():
+        try:
+            messages = _history_stream_batch(client, consumer)
+            if not messages:
+                continue
+
+            ids = [message_id for message_id, _ in messages]
+            payloads = [
+                (message_id, data[b"payload"])
+                for message_id, data in messages
+                if data and b"payload" in data
+            ]
 
-        # -----------------------------------------
-        # Resolve store name from linked table if missing
-        # -----------------------------------------
-        if not store_name and store_id:
             try:
-                stores_table = _airtable_table(STORES_TABLE)
-                rec = stores_table.get(store_id)
-                store_name = rec.get("fields", {}).get("Store", "")
-                print(f"Resolved store_name → {store_name}")
+                _write_history_rows([orjson.loads(raw) for _, raw in payloads])
             except Exception as e:
-                print("⚠️ Could not resolve linked store name:", e)
+                # One bad row fails the whole batch — retry rows one by one
+                logger.warning("⚠️ History stream batch failed, writing rows singly: %s", e)
+                ids = _write_history_stream_rows_singly(client, payloads)
 
-        if not store_id and not store_name:
-            raise HTTPException(400, "Either store_id or store name is required.")
+            if ids:
+                client.xack(HISTORY_STREAM, HISTORY_STREAM_GROUP, *ids)
+                client.xdel(HISTORY_STREAM, *ids)
 
-        # -----------------------------------------
-        # VALIDATION RULES
-        # -----------------------------------------
-        import math
-
-        numeric_fields = {
-            "Total Sales": payload.total_sales,
-            "Net Sales": payload.net_sales,
-            "Cash Payments": payload.cash_payments,
-            "Card Payments": payload.card_payments,
-            "Digital Payments": payload.digital_payments,
-            "Grab Payments": payload.grab_payments,
-            "Voucher Payments": payload.voucher_payments,
-            "Bank Transfer Payments": payload.bank_transfer_payments,
-            "Marketing Expenses": payload.marketing_expenses,
-            "Actual Cash Counted": payload.actual_cash_counted,
-            "Cash Float": payload.cash_float,
-            "Kitchen Budget": payload.kitchen_budget,
-            "Bar Budget": payload.bar_budget,
-            "Non Food Budget": payload.non_food_budget,
-            "Staff Meal Budget": payload.staff_meal_budget,
-        }
+        except Exception as e:
+            logger.warning("⚠️ History stream flush failed (will retry): %s", e)
+            _history_stream_stop.wait(HISTORY_FLUSH_INTERVAL * 4)
 
-        for field_name, value in numeric_fields.items():
-            if value is not None:
-                if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-                    raise HTTPException(400, f"{field_name} contains an invalid number.")
-                if value < 0:
-                    raise HTTPException(400, f"{field_name} cannot be negative.")
-
-        if payload.total_sales is not None and payload.net_sales is not None:
-            if payload.net_sales > payload.total_sales:
-                raise HTTPException(400, "Net sales cannot exceed total sales.")
-
-        payments_sum = (
-            (payload.cash_payments or 0)
-            + (payload.card_payments or 0)
-            + (payload.digital_payments or 0)
-            + (payload.grab_payments or 0)
-            + (payload.voucher_payments or 0)
-            + (payload.bank_transfer_payments or 0)
-            + (payload.marketing_expenses or 0)
-        )
+@app.on_event("startup")
+def start_history_writer():
+    global _history_thread, _history_stream_thread
 
-        if payload.total_sales is not None:
-            if abs(payments_sum - payload.total_sales) > 1:
-                raise HTTPException(
-                    400,
-                    f"Sum of payments ({payments_sum}) must equal Total Sales ({payload.total_sales}).",
+    with _history_writer_lock:
+        if _history_thread is None or not _history_thread.is_alive():
+            _history_thread = threading.Thread(
+                target=_history_writer, name="history-writer", daemon=True
+            )
+            _history_thread.start()
+
+        if _history_stream_client() is not None and (
+            _history_stream_thread is None or not _history_stream_thread.is_alive()
+        ):
+            _history_stream_stop.clear()
+            _history_stream_thread = threading.Thread(
+                target=_history_stream_consumer,
+                name="history-stream-consumer",
+                daemon=True,
+            )
+            _history_stream_thread.start()
+
+@app.on_event("shutdown")
+def stop_history_writer():
+    """
+    Flushes queued history rows before the worker exits.
+    Stream entries need no flush — they stay in Redis for the next consumer.
+    """
+    with _history_writer_lock:
+        _history_stream_stop.set()
+
+        if _history_thread is None or not _history_thread.is_alive():
+            return
+        HISTORY_QUEUE.put(_HISTORY_STOP)
+        _history_thread.join(timeout=10)
+
+def log_history_in_background(*entries: dict):
+    """
+    Queues history entries (keyword arguments of _history_payload) for the
+    background flusher — the Redis stream when HISTORY_STREAM is set, else
+    the in-process queue. A full queue falls back to writing inline, so no
+    row is dropped.
+    """
+    client = _history_stream_client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            for entry in entries:
+                pipe.xadd(
+                    HISTORY_STREAM,
+                    {"payload": orjson.dumps(entry, default=str)},
                 )
+            pipe.execute()
+            return
+        except Exception as e:
+            logger.warning("⚠️ History stream write failed — using local queue: %s", e)
 
-        budget_total = (
-            (payload.kitchen_budget or 0)
-            + (payload.bar_budget or 0)
-            + (payload.non_food_budget or 0)
-            + (payload.staff_meal_budget or 0)
-        )
+    for i, entry in enumerate(entries):
+        try:
+            HISTORY_QUEUE.put_nowait(entry)
+        except queue.Full:
+            logger.warning("⚠️ History queue full — writing inline")
+            _log_history_batch(list(entries[i:]))
+            return
+
+# -----------------------------------------------------------
+# 🔍 Closing lookup formula (store + date, filtered by Airtable)
+# -----------------------------------------------------------
+def _closing_lookup_formula(business_date: str, store_name: Optional[str]) -> str:
+    """
+    Formula matching closings for one business date, narrowed to a store.
+
+    Linked {Store} values are the Stores table primary field (names), so the
+    store filter matches the display name, or the legacy {Store Normalized}.
+    FIND is a substring match — callers still confirm the exact store.
+    """
+    date_clause = _date_formula(business_date)
+    if not store_name:
+        return date_clause
+
+    safe_store_name = _escape_formula_str(store_name)
+    normalized = normalize_store_value(store_name)
+    return (
+        "AND("
+        f"{date_clause},"
+        "OR("
+        f"FIND('{safe_store_name}', ARRAYJOIN({{Store}})),"
+        f"{{Store Normalized}}='{_escape_formula_str(normalized)}'"
+        ")"
+        ")"
+    )
+
+def _first_matching_record(
+    table: Table,
+    formula: str,
+    predicate,
+    page_size: int = 10,
+    fields: Optional[List[str]] = None,
+):
+    """
+    Streams matching records page by page and returns the first one that
+    satisfies `predicate` — later pages are never requested once found.
+    `fields` narrows the columns returned (must cover what `predicate` reads).
+    """
+    options = {"fields": fields} if fields else {}
+    for page in table.iterate(formula=formula, page_size=page_size, **options):
+        for rec in page:
+            if predicate(rec):
+                return rec
+    return None
+
+# -----------------------------------------------------------
+# 🧮 Closing write helpers (shared by /closings and /closings/batch)
+# -----------------------------------------------------------
+_LOCKED_STATUSES = frozenset({"Locked", "Verified"})
+
+# Daily Closing columns computed by Airtable — never written by the API
+FORMULA_FIELDS = (
+    "Variance",
+    "Cash for Deposit",
+    "Total Budgets",
+    "Deposit Discrepancy",
+)
+
+# (Airtable column, ClosingCreate attribute) for every numeric input column
+_CLOSING_NUMERIC_FIELDS = (
+    ("Total Sales", "total_sales"),
+    ("Net Sales", "net_sales"),
+    ("Cash Payments", "cash_payments"),
+    ("Card Payments", "card_payments"),
+    ("Digital Payments", "digital_payments"),
+    ("Grab Payments", "grab_payments"),
+    ("Voucher Payments", "voucher_payments"),
+    ("Bank Transfer Payments", "bank_transfer_payments"),
+    ("Marketing Expenses", "marketing_expenses"),
+    ("Actual Cash Counted", "actual_cash_counted"),
+    ("Cash Float", "cash_float"),
+    ("Kitchen Budget", "kitchen_budget"),
+    ("Bar Budget", "bar_budget"),
+    ("Non Food Budget", "non_food_budget"),
+    ("Staff Meal Budget", "staff_meal_budget"),
+)
+
+_INF = math.inf
+_NEG_INF = -math.inf
+
+
+def _validate_closing_payload(payload: ClosingCreate):
+    """
+    Business rules for a submitted closing. Raises HTTPException(400).
+    """
+    for field_name, attr in _CLOSING_NUMERIC_FIELDS:
+        value = getattr(payload, attr)
+        if value is None:
+            continue
+        # value != value is the NaN check
+        if value != value or value == _INF or value == _NEG_INF:
+            raise HTTPException(400, f"{field_name} contains an invalid number.")
+        if value < 0:
+            raise HTTPException(400, f"{field_name} cannot be negative.")
+
+    if payload.total_sales is not None and payload.net_sales is not None:
+        if payload.net_sales > payload.total_sales:
+            raise HTTPException(400, "Net sales cannot exceed total sales.")
+
+    payments_sum = (
+        (payload.cash_payments or 0)
+        + (payload.card_payments or 0)
+        + (payload.digital_payments or 0)
+        + (payload.grab_payments or 0)
+        + (payload.voucher_payments or 0)
+        + (payload.bank_transfer_payments or 0)
+        + (payload.marketing_expenses or 0)
+    )
 
-        if payload.net_sales is not None and budget_total > payload.net_sales:
+    if payload.total_sales is not None:
+        if abs(payments_sum - payload.total_sales) > 1:
             raise HTTPException(
                 400,
-                f"Total budget allocation ({budget_total}) cannot exceed Net Sales ({payload.net_sales}).",
+                f"Sum of payments ({payments_sum}) must equal Total Sales ({payload.total_sales}).",
             )
 
-        # -----------------------------------------
-        # FIND EXISTING RECORD (store + date)
-        # -----------------------------------------
-        date_formula = (
-            f"IS_SAME({{Date}}, DATETIME_PARSE('{business_date}', 'YYYY-MM-DD'), 'day')"
+    budget_total = (
+        (payload.kitchen_budget or 0)
+        + (payload.bar_budget or 0)
+        + (payload.non_food_budget or 0)
+        + (payload.staff_meal_budget or 0)
+    )
+
+    if payload.net_sales is not None and budget_total > payload.net_sales:
+        raise HTTPException(
+            400,
+            f"Total budget allocation ({budget_total}) cannot exceed Net Sales ({payload.net_sales}).",
         )
-        candidates = table.all(formula=date_formula, max_records=50)
 
-        existing = None
-        normalized_target = normalize_store_value(store_name)
+# What the upsert needs from the existing closing: match columns + lock rules
+EXISTING_CLOSING_FIELDS = ["Store", "Store Normalized", "Lock Status", "Verified Status"]
 
-        for rec in candidates:
-            fields = rec.get("fields", {})
-            linked_ids = fields.get("Store") or []
+# Optional Daily Closing formula column "<linked Store record ID>|YYYY-MM-DD",
+# e.g. "Lookup Key" = ARRAYJOIN({Store Record ID}) & "|" & DATETIME_FORMAT({Date}, 'YYYY-MM-DD').
+# When set, closings with a store_id are found by exact match on it.
+LOOKUP_KEY_FIELD = os.getenv("AIRTABLE_LOOKUP_KEY_FIELD")
 
-            if store_id and isinstance(linked_ids, list) and store_id in linked_ids:
-                existing = rec
-                break
+def _find_existing_closing(
+    table: Table,
+    business_date: str,
+    store_id: str,
+    store_name: str,
+    fields: Optional[List[str]] = EXISTING_CLOSING_FIELDS,
+) -> Optional[dict]:
+    """
+    Finds the closing for store + date (linked Store ID first, then the
+    legacy Store Normalized name). With LOOKUP_KEY_FIELD configured and a
+    store_id given, a single exact-match query replaces the scan.
+    Shared by the upsert and /closings/unique; `fields=None` returns
+    every column.
+
+    Airtable narrows by the store's display name first; if that finds
+    nothing, every closing on the date is checked so a mismatched store
+    label can never create a duplicate (or bypass the lock check).
+    """
+    options = {"fields": fields} if fields else {}
+
+    if LOOKUP_KEY_FIELD and store_id:
+        lookup_key = _escape_formula_str(f"{store_id}|{business_date}")
+        records = table.all(
+            formula=f"{{{LOOKUP_KEY_FIELD}}}='{lookup_key}'",
+            max_records=1,
+            **options,
+        )
+        return records[0] if records else None
 
-            rec_norm = normalize_store_value(fields.get("Store Normalized", ""))
-            if rec_norm == normalized_target:
-                existing = rec
-                break
+    normalized_target = normalize_store_value(store_name)
 
-        # -----------------------------------------
-        # 📧 Determine email reason (SAFE & EXPLICIT)
-        # -----------------------------------------
-        if not existing:
-            email_reason = "first_submission"
-        else:
-            prev_status = existing.get("fields", {}).get("Verified Status")
-            email_reason = (
-                "resubmission_after_update"
-                if prev_status == "Needs Update"
-                else None
+    def is_match(rec: dict) -> bool:
+        rec_fields = rec.get("fields", {})
+        linked_ids = rec_fields.get("Store") or []
+
+        if store_id and isinstance(linked_ids, list) and store_id in linked_ids:
+            return True
+
+        rec_norm = normalize_store_value(rec_fields.get("Store Normalized", ""))
+        return bool(normalized_target) and rec_norm == normalized_target
+
+    # Narrow by the Stores primary field, not the client-sent label
+    filter_name = (resolve_store_display_name(store_id) if store_id else "") or store_name
+    match = _first_matching_record(
+        table,
+        _closing_lookup_formula(business_date, filter_name),
+        is_match,
+        fields=fields,
+    )
+    if match is not None or not filter_name:
+        return match
+
+    # Name filter missed (label / primary field mismatch): scan the whole date
+    return _first_matching_record(
+        table,
+        _closing_lookup_formula(business_date, None),
+        is_match,
+        fields=fields,
+    )
+
+def _prepare_closing_write(table: Table, payload: ClosingCreate, now_iso: str) -> dict:
+    """
+    Validates one closing and works out what to write, without writing.
+
+    Returns a plan dict:
+    - existing: matching Airtable record (None → create)
+    - fields: Airtable fields to send
+    - email_reason: first_submission | resubmission_after_update | None
+    plus the resolved store_id / store_name / business_date / tenant_id.
+    """
+    # -----------------------------------------
+    # Extract incoming values
+    # -----------------------------------------
+    store_id = (payload.store_id or "").strip()
+    store_name = (payload.store or "").strip()
+    business_date = payload.business_date.isoformat()
+
+    # ✅ NEW: Closing Notes (Cashier)
+    closing_notes = getattr(payload, "closing_notes", None)
+
+    # -----------------------------------------
+    # Resolve tenant
+    # -----------------------------------------
+    tenant_id = resolve_tenant_id(getattr(payload, "tenant_id", None))
+
+    # -----------------------------------------
+    # Resolve store name from linked table if missing
+    # -----------------------------------------
+    if not store_name and store_id:
+        store_name = resolve_store_display_name(store_id)
+
+    if not store_id and not store_name:
+        raise HTTPException(400, "Either store_id or store name is required.")
+
+    # -----------------------------------------
+    # VALIDATION RULES
+    # -----------------------------------------
+    _validate_closing_payload(payload)
+
+    # -----------------------------------------
+    # FIND EXISTING RECORD (store + date)
+    # -----------------------------------------
+    existing = _find_existing_closing(table, business_date, store_id, store_name)
+
+    # -----------------------------------------
+    # 📧 Determine email reason (SAFE & EXPLICIT)
+    # -----------------------------------------
+    if not existing:
+        email_reason = "first_submission"
+    else:
+        prev_status = existing.get("fields", {}).get("Verified Status")
+        email_reason = (
+            "resubmission_after_update"
+            if prev_status == "Needs Update"
+            else None
+        )
+
+    # -----------------------------------------
+    # PREPARE PAYLOAD FOR AIRTABLE
+    # -----------------------------------------
+    fields = {
+        "Date": business_date,
+        "Tenant ID": tenant_id,
+        "Last Updated At": now_iso,
+    }
+    for key, attr in _CLOSING_NUMERIC_FIELDS:
+        fields[key] = getattr(payload, attr)
+
+    # Optional columns: only send when provided (None would clear them)
+    if payload.submitted_by is not None:
+        fields["Submitted By"] = payload.submitted_by
+        fields["Last Updated By"] = payload.submitted_by
+
+    # ✅ NEW: Persist cashier notes
+    if closing_notes:
+        fields["Closing Notes"] = closing_notes
+
+    if store_id:
+        fields["Store"] = [store_id]
+    else:
+        fields["Store"] = store_name
+
+    # Only dates need coercing (datetime is a date subclass); None is kept
+    # so an explicit null still clears the column
+    fields = {
+        k: (v.isoformat() if isinstance(v, dt_date) else v)
+        for k, v in fields.items()
+    }
+
+    # -----------------------------------------
+    # Existing record: lock rules + Needs Update reset
+    # -----------------------------------------
+    if existing:
+        lock_status = existing["fields"].get("Lock Status", "Unlocked")
+        prev_verified_status = existing["fields"].get("Verified Status")
+
+        if prev_verified_status == "Needs Update":
+            fields.update({
+                "Verified Status": "Pending",
+                "Verified At": None,
+                "Food Cost Deducted": 0,
+            })
+
+        if lock_status in _LOCKED_STATUSES and prev_verified_status != "Needs Update":
+            raise HTTPException(
+                403, f"Record for {store_name} on {business_date} is locked."
             )
 
-        # -----------------------------------------
-        # PREPARE PAYLOAD FOR AIRTABLE
-        # -----------------------------------------
-        fields = {
-            "Date": business_date,
-            "Tenant ID": tenant_id,
-            "Submitted By": payload.submitted_by,
-            "Last Updated By": payload.submitted_by,
-            "Last Updated At": datetime.now().isoformat(),
-            "Total Sales": payload.total_sales,
-            "Net Sales": payload.net_sales,
-            "Cash Payments": payload.cash_payments,
-            "Card Payments": payload.card_payments,
-            "Digital Payments": payload.digital_payments,
-            "Grab Payments": payload.grab_payments,
-            "Voucher Payments": payload.voucher_payments,
-            "Bank Transfer Payments": payload.bank_transfer_payments,
-            "Marketing Expenses": payload.marketing_expenses,
-            "Actual Cash Counted": payload.actual_cash_counted,
-            "Cash Float": payload.cash_float,
-            "Kitchen Budget": payload.kitchen_budget,
-            "Bar Budget": payload.bar_budget,
-            "Non Food Budget": payload.non_food_budget,
-            "Staff Meal Budget": payload.staff_meal_budget,
-        }
+    fields["Lock Status"] = "Locked"
 
-        # ✅ NEW: Persist cashier notes
-        if closing_notes:
-            fields["Closing Notes"] = closing_notes
+    return {
+        "store_id": store_id,
+        "store_name": store_name,
+        "business_date": business_date,
+        "tenant_id": tenant_id,
+        "submitted_by": payload.submitted_by,
+        "existing": existing,
+        "fields": fields,
+        "email_reason": email_reason,
+    }
 
-        if store_id:
-            fields["Store"] = [store_id]
-        else:
-            fields["Store"] = store_name
+def _closing_history_entry(plan: dict, fresh: dict, now_iso: str) -> dict:
+    """
+    History entry (_history_payload kwargs) for a written closing.
+    """
+    fresh_fields = fresh.get("fields", {})
+    return {
+        "action": "Updated" if plan["existing"] else "Created",
+        "store": plan["store_name"],
+        "business_date": plan["business_date"],
+        "fields_snapshot": fresh_fields,
+        "submitted_by": plan["submitted_by"],
+        "record_id": fresh.get("id"),
+        "lock_status": fresh_fields.get("Lock Status"),
+        "changed_fields": list(plan["fields"].keys()),
+        "tenant_id": plan["tenant_id"],
+        "timestamp": now_iso,
+    }
 
-        for f in ["Variance", "Cash for Deposit", "Total Budgets"]:
-            fields.pop(f, None)
+def _after_closing_write(plan: dict, fresh: dict, background_tasks: BackgroundTasks):
+    """
+    Cache invalidation + submission email for a written closing.
+    The email is sent after the response (BackgroundTasks).
+    """
+    fresh_fields = fresh.get("fields", {})
+    invalidate_closing_cache(fresh_fields)
+
+    if plan["email_reason"]:
+        background_tasks.add_task(
+            send_closing_submission_email,
+            store_name=plan["store_name"],
+            business_date=plan["business_date"],
+            submitted_by=plan["submitted_by"],
+            reason=plan["email_reason"],
+            closing_fields=fresh_fields,
+        )
 
-        fields = json.loads(json.dumps(fields, default=str))
+def _closing_write_response(plan: dict, fresh: dict) -> dict:
+    fresh_fields = fresh.get("fields", {})
+    return {
+        "status": "updated_locked" if plan["existing"] else "created_locked",
+        "id": fresh.get("id"),
+        "lock_status": fresh_fields.get("Lock Status", "Locked"),
+        "fields": fresh_fields,
+    }
+
+# -----------------------------------------------------------
+# 📌 UPSERT — Create or Update + Lock
+# -----------------------------------------------------------
+@app.post("/closings")
+def upsert_closing(payload: ClosingCreate, background_tasks: BackgroundTasks):
+    """
+    Create or update a daily closing record in Airtable.
+    Prefers store_id (linked Store) but still accepts store name for compatibility.
+    """
+
+    try:
+        table = _airtable_table(DAILY_CLOSINGS_TABLE)
+        now_iso = iso_now()
+
+        plan = _prepare_closing_write(table, payload, now_iso)
 
         # ===========================================================
-        # UPDATE EXISTING
+        # UPDATE EXISTING / CREATE NEW
         # ===========================================================
-        if existing:
-            rec_id = existing["id"]
-            lock_status = existing["fields"].get("Lock Status", "Unlocked")
+        # Both calls return the full saved record (formula fields included)
+        if plan["existing"]:
+            fresh = table.update(plan["existing"]["id"], plan["fields"])
+        else:
+            fresh = table.create(plan["fields"])
 
-            prev_verified_status = existing["fields"].get("Verified Status")
+        log_history_in_background(_closing_history_entry(plan, fresh, now_iso))
+        _after_closing_write(plan, fresh, background_tasks)
 
-            if prev_verified_status == "Needs Update":
-                fields.update({
-                    "Verified Status": "Pending",
-                    "Verified At": None,
-                    "Food Cost Deducted": 0,
-                })
+        return _closing_write_response(plan, fresh)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("❌ Error during upsert")
+        raise HTTPException(500, str(e))
 
-            if lock_status in ["Locked", "Verified"] and prev_verified_status != "Needs Update":
+# -----------------------------------------------------------
+# 📦 BATCH UPSERT — several closings in one request
+# -----------------------------------------------------------
+CLOSING_BATCH_LIMIT = 10  # Airtable accepts up to 10 records per write
+
+
+class ClosingBatchCreate(BaseModel):
+    closings: List[ClosingCreate] = Field(
+        ..., min_length=1, max_length=CLOSING_BATCH_LIMIT
+    )
+
+
+@app.post("/closings/batch")
+def upsert_closings_batch(payload: ClosingBatchCreate, background_tasks: BackgroundTasks):
+    """
+    Create or update up to 10 closings (e.g. end-of-day catch-up) with the
+    same rules as POST /closings, but with batched Airtable writes:
+    one create call, one update call and one history call.
+
+    All closings are validated before anything is written; a validation
+    failure rejects the whole batch. If the update call fails after the
+    creates went through, the created closings are kept (history, cache
+    invalidation and emails as usual) and the response is a 207 with a
+    per-closing status, the failed ones marked "failed".
+    """
+    try:
+        table = _airtable_table(DAILY_CLOSINGS_TABLE)
+        now_iso = iso_now()
+
+        plans = [_prepare_closing_write(table, c, now_iso) for c in payload.closings]
+
+        seen = set()
+        for plan in plans:
+            # Same store sent once by ID and once by name → same key
+            store_label = plan["store_name"]
+            if plan["store_id"]:
+                store_label = resolve_store_display_name(plan["store_id"]) or store_label
+            keys = {("store", normalize_store_value(store_label), plan["business_date"])}
+            if plan["existing"]:
+                keys.add(("record", plan["existing"]["id"]))
+
+            if keys & seen:
                 raise HTTPException(
-                    403, f"Record for {store_name} on {business_date} is locked."
+                    400,
+                    f"Duplicate closing for {plan['store_name'] or plan['store_id']} "
+                    f"on {plan['business_date']} in batch.",
                 )
+            seen |= keys
 
-            fields["Lock Status"] = "Locked"
-            table.update(rec_id, fields)
-            fresh = table.get(rec_id)
-
-            _log_history(
-                action="Updated",
-                store=store_name,
-                business_date=business_date,
-                fields_snapshot=fresh.get("fields", {}),
-                submitted_by=payload.submitted_by,
-                record_id=rec_id,
-                lock_status=fresh["fields"].get("Lock Status"),
-                changed_fields=list(fields.keys()),
-                tenant_id=tenant_id,
-            )
+        creates = [p for p in plans if not p["existing"]]
+        updates = [p for p in plans if p["existing"]]
 
-            if email_reason == "resubmission_after_update":
-                send_closing_submission_email(
-                    store_name=store_name,
-                    business_date=business_date,
-                    submitted_by=payload.submitted_by,
-                    reason="resubmission_after_update",
-                    closing_fields=fresh.get("fields", {}),
-                )
+        # Airtable returns full records (formula fields included) from both calls
+        failed = None
+        if creates:
+            created = table.batch_create([p["fields"] for p in creates])
+            for plan, rec in zip(creates, created):
+                plan["fresh"] = rec
 
-            return {
-                "status": "updated_locked",
-                "id": rec_id,
-                "lock_status": fresh["fields"].get("Lock Status", "Locked"),
-                "fields": fresh["fields"],
-            }
+        if updates:
+            try:
+                updated = table.batch_update([
+                    {"id": p["existing"]["id"], "fields": p["fields"]}
+                    for p in updates
+                ])
+                for plan, rec in zip(updates, updated):
+                    plan["fresh"] = rec
+            except Exception as e:
+                if not creates:
+                    raise
+                # Creates already landed — report them, don't hide them behind a 500
+                logger.exception("❌ Batch update failed after creating %d closings", len(creates))
+                failed = str(e)
 
-        # ===========================================================
-        # CREATE NEW
-        # ===========================================================
-        fields["Lock Status"] = "Locked"
-        created = table.create(fields)
-        fresh = table.get(created["id"])
-
-        _log_history(
-            action="Created",
-            store=store_name,
-            business_date=business_date,
-            fields_snapshot=fresh.get("fields", {}),
-            submitted_by=payload.submitted_by,
-            record_id=fresh.get("id"),
-            lock_status=fresh["fields"].get("Lock Status"),
-            changed_fields=list(fields.keys()),
-            tenant_id=tenant_id,
-        )
+        written = [p for p in plans if "fresh" in p]
+        log_history_in_background(*[
+            _closing_history_entry(p, p["fresh"], now_iso) for p in written
+        ])
 
-        send_closing_submission_email(
-            store_name=store_name,
-            business_date=business_date,
-            submitted_by=payload.submitted_by,
-            reason="first_submission",
-            closing_fields=fresh.get("fields", {}),
-        )
+        results = []
+        for plan in plans:
+            if "fresh" not in plan:
+                results.append({
+                    "status": "failed",
+                    "id": plan["existing"]["id"],
+                    "store": plan["store_name"] or plan["store_id"],
+                    "business_date": plan["business_date"],
+                    "error": failed,
+                })
+                continue
+            _after_closing_write(plan, plan["fresh"], background_tasks)
+            results.append(_closing_write_response(plan, plan["fresh"]))
 
-        return {
-            "status": "created_locked",
-            "id": fresh.get("id"),
-            "lock_status": fresh["fields"].get("Lock Status", "Locked"),
-            "fields": fresh["fields"],
-        }
+        body = {"count": len(results), "results": results}
+        if failed:
+            return ORJSONResponse(status_code=207, content=body)
+        return body
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Error during upsert:", e)
+        logger.exception("❌ Error during batch upsert")
         raise HTTPException(500, str(e))
 
 # -----------------------------------------------------------
 # 🔓 UNLOCK — Manager PIN
 # -----------------------------------------------------------
-def _constant_time_equal(a: str, b: str) -> bool:
-    """Prevents timing attacks — safe string comparison."""
-    if len(a) != len(b):
-        return False
-    result = 0
-    for x, y in zip(a, b):
-        result |= ord(x) ^ ord(y)
-    return result == 0
+# Encoded once at load — compared as bytes (hmac.compare_digest, constant time)
+MANAGER_PIN = (os.getenv("MANAGER_PIN") or "").strip().encode("utf-8")
+
+if not MANAGER_PIN:
+    logger.warning("⚠️ MANAGER_PIN is not set — closing unlocks will be rejected")
 
 
 @app.post("/closings/{record_id}/unlock")
@@ -1753,16 +2702,16 @@ def unlock_closing(record_id: str, payload: UnlockPayload):
         # ------------------------------------------------------------------
         # ⭐ FIXED: Proper PIN loading + sanitization
         # ------------------------------------------------------------------
-        manager_pin = (os.getenv("MANAGER_PIN") or "").strip()
-        incoming_pin = str(payload.pin).strip()
+        incoming_pin = str(payload.pin or "").strip().encode("utf-8")
 
-        if not _constant_time_equal(incoming_pin, manager_pin):
+        if not MANAGER_PIN or not hmac.compare_digest(incoming_pin, MANAGER_PIN):
             raise HTTPException(status_code=401, detail="Invalid PIN")
 
         # Prepare updates
+        now_iso = iso_now()
         updates = {
             "Lock Status": "Unlocked",
-            "Unlocked At": datetime.now().isoformat(),
+            "Unlocked At": now_iso,
             "Unlocked By": "Manager PIN",
         }
 
@@ -1771,13 +2720,19 @@ def unlock_closing(record_id: str, payload: UnlockPayload):
         # Refresh to include formula fields
         fresh = table.get(record_id)
         fields = fresh.get("fields", {})
+        invalidate_closing_cache(fields)
 
-        # Resolve store name in a safe, guaranteed way
-        store_value = fields.get("Store Normalized") or fields.get("Store") or ""
+        # Resolve store name in a safe, guaranteed way (linked Store is a list of IDs)
+        linked_store = fields.get("Store")
+        store_value = (
+            resolve_store_display_name(linked_store[0])
+            if isinstance(linked_store, list) and linked_store
+            else linked_store
+        ) or fields.get("Store Normalized") or "Unknown"
 
-        # Log history (best effort)
+        # Log history (best effort, background writer)
         try:
-            _log_history(
+            log_history_in_background(dict(
                 action="Unlocked",
                 store=store_value,
                 business_date=fields.get("Date"),
@@ -1787,43 +2742,128 @@ def unlock_closing(record_id: str, payload: UnlockPayload):
                 lock_status=fields.get("Lock Status"),
                 changed_fields=list(updates.keys()),
                 tenant_id=fields.get("Tenant ID") or DEFAULT_TENANT_ID,
-            )
+                timestamp=now_iso,
+            ))
         except Exception as e:
-            print("⚠️ Unlock history failed:", e)
+            logger.warning("⚠️ Unlock history failed: %s", e)
 
         return fresh
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Unlock error:", e)
+        logger.exception("❌ Unlock error")
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------------------------------------
 # 🔍 Filter helper for listing closings (legacy name-based)
 # -----------------------------------------------------------
+# Optional Daily Closing view filtered to IS_SAME({Date}, TODAY(), 'day'),
+# e.g. "Closings Today". The base timezone must match the server's date.
+TODAY_CLOSINGS_VIEW = os.getenv("AIRTABLE_TODAY_CLOSINGS_VIEW")
+
+def _closings_date_source(business_date: Optional[str]):
+    """
+    Returns (view, business_date_for_formula): today's date reads the
+    pre-filtered view (no date clause); any other date uses the formula.
+    """
+    if (
+        TODAY_CLOSINGS_VIEW
+        and business_date
+        and business_date == dt_date.today().isoformat()
+    ):
+        return TODAY_CLOSINGS_VIEW, None
+    return None, business_date
+
 def _airtable_filter_formula(business_date: Optional[str],
                              store: Optional[str]) -> Optional[str]:
-    clauses = []
+    return _formula_store_date(
+        normalize_store_value(store) if store else None, business_date
+    )
 
-    if business_date:
-        clauses.append(
-            f"IS_SAME({{Date}}, DATETIME_PARSE('{business_date}','YYYY-MM-DD'), 'day')"
+
+# -----------------------------------------------------------
+# 🎯 Unique closing (prefill)
+# -----------------------------------------------------------
+def _unique_closing_ttl(result: dict) -> int:
+    return CLOSING_CACHE_TTL if result["status"] == "found" else CLOSING_EMPTY_CACHE_TTL
+
+def _load_unique_closing(
+    business_date: str,
+    store_id: Optional[str],
+    store_name: Optional[str],
+    store: Optional[str],
+    cache_key: Optional[str],
+) -> dict:
+    """
+    Airtable lookup behind /closings/unique (caches the result).
+    """
+    table = _airtable_table(DAILY_CLOSINGS_TABLE)
+
+    # ---------------------------------------------------
+    # 1) Preferred path: filter by store_id + date
+    # ---------------------------------------------------
+    if store_id:
+        # Same lookup as the upsert (exact key, name-narrowed scan, date rescan)
+        match = _find_existing_closing(
+            table, business_date, store_id, "", fields=None
         )
 
-    if store:
-        normalized_store = normalize_store_value(store)
-        clauses.append(f"{{Store Normalized}}='{normalized_store}'")
+        if not match:
+            result = {
+                "status": "empty",
+                "message": f"No record found for store_id={store_id} on {business_date}",
+                "fields": {},
+                "lock_status": "Unlocked",
+            }
+        else:
+            fields = match.get("fields", {})
+            result = {
+                "status": "found",
+                "id": match.get("id"),
+                "lock_status": fields.get("Lock Status", "Unlocked"),
+                "fields": fields,
+            }
 
-    if not clauses:
-        return None
+        cache_set(cache_key, result, _unique_closing_ttl(result))
+        return result
 
-    return "AND(" + ",".join(clauses) + ")"
+    # ---------------------------------------------------
+    # 2) Fallback: use store_name / store + Store Normalized
+    # ---------------------------------------------------
+    effective_store_name = store_name or store
+    if not effective_store_name:
+        raise HTTPException(
+            status_code=400,
+            detail="Either store_id or store_name/store is required.",
+        )
 
+    normalized_store = normalize_store_value(effective_store_name)
+
+    formula = _formula_store_date(normalized_store, business_date)
+
+    records = table.all(formula=formula, max_records=1)
+
+    if not records:
+        result = {
+            "status": "empty",
+            "message": f"No record found for {effective_store_name} on {business_date}",
+            "fields": {},
+            "lock_status": "Unlocked",
+        }
+    else:
+        r = records[0]
+        fields = r.get("fields", {})
+        result = {
+            "status": "found",
+            "id": r.get("id"),
+            "lock_status": fields.get("Lock Status", "Unlocked"),
+            "fields": fields,
+        }
+
+    cache_set(cache_key, result, _unique_closing_ttl(result))
+    return result
 
-# -----------------------------------------------------------
-# 🎯 Unique closing (prefill)
-# -----------------------------------------------------------
 @app.get("/closings/unique")
 def get_unique_closing(
     business_date: str = Query(...),
@@ -1852,94 +2892,27 @@ def get_unique_closing(
     - fields: raw Airtable fields (if found)
     """
     try:
-        table = _airtable_table(DAILY_CLOSINGS_TABLE)
-
-        # ---------------------------------------------------
-        # 1) Preferred path: filter by store_id + date
-        # ---------------------------------------------------
-        if store_id:
-            # Build a date-only formula using IS_SAME + DATETIME_PARSE
-            date_formula = (
-                "IS_SAME("
-                "{{Date}}, "
-                "DATETIME_PARSE('{bd}', 'YYYY-MM-DD'), "
-                "'day'"
-                ")"
-            ).format(bd=business_date)
-
-            candidates = table.all(formula=date_formula, max_records=50)
-
-            match = None
-            for r in candidates:
-                f = r.get("fields", {})
-                linked_ids = f.get("Store") or []
-                # Airtable linked-field is usually a list of record IDs
-                if isinstance(linked_ids, list) and store_id in linked_ids:
-                    match = r
-                    break
-
-            if not match:
-                return {
-                    "status": "empty",
-                    "message": f"No record found for store_id={store_id} on {business_date}",
-                    "fields": {},
-                    "lock_status": "Unlocked",
-                }
-
-            fields = match.get("fields", {})
-            return {
-                "status": "found",
-                "id": match.get("id"),
-                "lock_status": fields.get("Lock Status", "Unlocked"),
-                "fields": fields,
-            }
-
-        # ---------------------------------------------------
-        # 2) Fallback: use store_name / store + Store Normalized
-        # ---------------------------------------------------
-        effective_store_name = store_name or store
-        if not effective_store_name:
-            raise HTTPException(
-                status_code=400,
-                detail="Either store_id or store_name/store is required.",
+        cache_key = closing_cache_key(business_date, store_id, store_name or store)
+        if cache_key:
+            hit = cache_get(cache_key)
+            if hit is not None:
+                return hit
+
+            # Concurrent identical polls share one Airtable lookup
+            return single_flight(
+                cache_key,
+                lambda: _load_unique_closing(
+                    business_date, store_id, store_name, store, cache_key
+                ),
             )
 
-        normalized_store = normalize_store_value(effective_store_name)
-
-        formula = (
-            "AND("
-            "{{Store Normalized}}='{normalized}', "
-            "IS_SAME("
-            "{{Date}}, "
-            "DATETIME_PARSE('{bd}', 'YYYY-MM-DD'), "
-            "'day'"
-            ")"
-            ")"
-        ).format(normalized=normalized_store, bd=business_date)
-
-        records = table.all(formula=formula, max_records=1)
-
-        if not records:
-            return {
-                "status": "empty",
-                "message": f"No record found for {effective_store_name} on {business_date}",
-                "fields": {},
-                "lock_status": "Unlocked",
-            }
-
-        r = records[0]
-        fields = r.get("fields", {})
-        return {
-            "status": "found",
-            "id": r.get("id"),
-            "lock_status": fields.get("Lock Status", "Unlocked"),
-            "fields": fields,
-        }
+        # No store given — raises the 400
+        return _load_unique_closing(business_date, store_id, store_name, store, None)
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Error in /closings/unique:", e)
+        logger.exception("❌ Error in /closings/unique")
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------------------------------------
@@ -1951,26 +2924,53 @@ def list_closings(
             None, description="Filter by business date YYYY-MM-DD"),
         store: Optional[str] = Query(None, description="Filter by store name"),
         limit: int = Query(50, description="Maximum records to return"),
+        fields: Optional[List[str]] = Query(
+            None, description="Only return these columns (repeat the param)"),
 ):
     """
     Lightweight admin endpoint used by the React dashboard to list closings.
     (Still uses legacy store name filter; can be extended to store_id later.)
     """
     try:
-        table = _airtable_table(DAILY_CLOSINGS_TABLE)
-        formula = _airtable_filter_formula(business_date, store)
-        records = table.all(max_records=limit, formula=formula)
+        view, formula_date = _closings_date_source(business_date)
+        formula = _airtable_filter_formula(formula_date, store)
 
-        return {
-            "count":
-            len(records),
-            "records": [{
-                "id": r.get("id"),
-                "fields": r.get("fields", {})
-            } for r in records],
-        }
+        # Only pass optional params that are set
+        options = {}
+        if view:
+            options["view"] = view
+        if fields:
+            options["fields"] = fields
+
+        def load():
+            table = _airtable_table(DAILY_CLOSINGS_TABLE)
+            records = table.all(max_records=limit, formula=formula, **options)
+
+            return {
+                "count":
+                len(records),
+                # Airtable records are already {"id", "createdTime", "fields"}
+                "records": records,
+            }
+
+        key = list_cache_key(
+            CLOSINGS_LIST_PREFIX,
+            business_date,
+            normalize_store_value(store) if store else None,
+            limit,
+            ",".join(sorted(fields)) if fields else None,
+        )
+        return cached(key, LIST_CACHE_TTL, load)
+    except HTTPException:
+        raise
+    except HTTPError as e:
+        # Airtable answers 422 for an unknown column name in `fields`
+        if fields and e.response is not None and e.response.status_code == 422:
+            raise HTTPException(status_code=400, detail="Unknown column in fields")
+        logger.exception("❌ Error listing closings")
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
-        print("❌ Error listing closings:", e)
+        logger.exception("❌ Error listing closings")
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------------------------------------
@@ -1997,31 +2997,26 @@ def patch_closing(record_id: str, payload: ClosingUpdate):
             updates.pop(f, None)
 
         table = _airtable_table(DAILY_CLOSINGS_TABLE)
-        existing = table.get(record_id)
-
-        if not existing:
-            raise HTTPException(status_code=404, detail="Record not found")
+        existing = get_record_or_404(table, record_id)
 
         fields_before = existing.get("fields", {})
 
         # Respect lock status (same behaviour as /closings upsert)
         lock_status = fields_before.get("Lock Status", "Unlocked")
-        if lock_status in ["Locked", "Verified"]:
+        if lock_status in _LOCKED_STATUSES:
             raise HTTPException(
                 status_code=403,
                 detail="Record is locked or verified and cannot be edited. "
                        "Please unlock before editing.",
             )
 
-        # Build merged snapshot as if this were the new full record
-        merged = dict(fields_before)
-        merged.update(updates)
+        # Merged view (patch over current fields) used only for validation —
+        # a ChainMap reads through both without copying the record
+        merged = ChainMap(updates, fields_before)
 
         # -----------------------------------------
         # Validation — mirror /closings logic
         # -----------------------------------------
-        import math
-
         # Map Airtable numeric fields from merged snapshot
         numeric_values = {
             "Total Sales": merged.get("Total Sales"),
@@ -2043,17 +3038,18 @@ def patch_closing(record_id: str, payload: ClosingUpdate):
 
         # 0️⃣ Reject NaN / Infinity / negatives
         for field_name, value in numeric_values.items():
-            if value is not None:
-                if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"{field_name} contains an invalid number."
-                    )
-                if value < 0:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"{field_name} cannot be negative."
-                    )
+            if value is None:
+                continue
+            if value != value or value == _INF or value == _NEG_INF:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{field_name} contains an invalid number."
+                )
+            if value < 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{field_name} cannot be negative."
+                )
 
         total_sales = numeric_values["Total Sales"]
         net_sales = numeric_values["Net Sales"]
@@ -2117,15 +3113,14 @@ def patch_closing(record_id: str, payload: ClosingUpdate):
         for f in FORMULA_FIELDS:
             updates.pop(f, None)
 
-        updated = table.update(record_id, updates)
-
-        # Fetch fresh record including formula values after Airtable recalculation
-        fresh = table.get(record_id)
+        # Airtable returns the full record (formula fields recalculated)
+        fresh = table.update(record_id, updates, typecast=True)
         changed_keys = list(updates.keys())
+        invalidate_closing_cache(fresh.get("fields", {}))
 
-        # Log history
+        # Log history (background writer)
         try:
-            _log_history(
+            log_history_in_background(dict(
                 action="Patched",
                 store=fresh["fields"].get("Store Name"),
                 business_date=fresh["fields"].get("Date"),
@@ -2135,23 +3130,28 @@ def patch_closing(record_id: str, payload: ClosingUpdate):
                 lock_status=fresh["fields"].get("Lock Status"),
                 changed_fields=changed_keys,
                 tenant_id=fresh["fields"].get("Tenant ID") or DEFAULT_TENANT_ID,
-            )
+                timestamp=iso_now(),
+            ))
         except Exception as e:
-            print("⚠️ Failed to log patch history:", e)
+            logger.warning("⚠️ Failed to log patch history: %s", e)
 
         return fresh
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Error in patch_closing:", e)
+        logger.exception("❌ Error in patch_closing")
         raise HTTPException(status_code=500, detail=str(e))
 
 # --------------------------------------------
 # Check if there is a closing that needs update
 # --------------------------------------------
+# The needs-update endpoints only return date + manager notes
+NEEDS_UPDATE_FIELDS = ["Date", "Verification Notes"]
+
+
 @app.get("/closings/needs-update")
-async def get_closing_needs_update(store_id: str):
+def get_closing_needs_update(store_id: str):
     """
     Returns the most recent closing marked as 'Needs Update' for the given store.
     """
@@ -2162,7 +3162,7 @@ async def get_closing_needs_update(store_id: str):
         if not store_name:
             raise HTTPException(status_code=400, detail="Could not resolve store name")
 
-        safe_store_name = store_name.replace("'", "\\'")
+        safe_store_name = _escape_formula_str(store_name)
 
         formula = (
             "AND("
@@ -2171,32 +3171,41 @@ async def get_closing_needs_update(store_id: str):
             ")"
         )
 
-        records = table.all(formula=formula, max_records=1, sort=["-Date"])
-        if not records:
-            return {"exists": False}
+        def load():
+            records = table.all(
+                formula=formula,
+                max_records=1,
+                sort=["-Date"],
+                fields=NEEDS_UPDATE_FIELDS,
+            )
+            if not records:
+                return {"exists": False}
 
-        r = records[0]
-        f = r.get("fields", {}) or {}
+            r = records[0]
+            f = r.get("fields", {}) or {}
 
-        return {
-            "exists": True,
-            "record_id": r.get("id"),
-            "business_date": f.get("Date"),
-            "store_name": store_name,
-            "notes": (f.get("Verification Notes") or "").strip(),
-        }
+            return {
+                "exists": True,
+                "record_id": r.get("id"),
+                "business_date": f.get("Date"),
+                "store_name": store_name,
+                "notes": (f.get("Verification Notes") or "").strip(),
+            }
+
+        key = list_cache_key(CLOSINGS_LIST_PREFIX, "needs-update", store_id)
+        return cached(key, LIST_CACHE_TTL, load)
 
     except HTTPException:
         raise
-    except Exception as e:
-        print("❌ needs-update error:", str(e))
+    except Exception:
+        logger.exception("❌ needs-update error")
         raise HTTPException(status_code=500, detail="Failed to check updates")
 
 # --------------------------------------------
 # List all closings that need update (per store)
 # --------------------------------------------
 @app.get("/closings/needs-update-list")
-async def get_closings_needing_update(store_id: str):
+def get_closings_needing_update(store_id: str):
     """
     Returns ALL closings marked as 'Needs Update'
     for the given store.
@@ -2204,119 +3213,497 @@ async def get_closings_needing_update(store_id: str):
     Store is a Linked Record field.
     Linked record values = Store table PRIMARY FIELD ("Store"), not record IDs.
     """
-    try:
-        closings_table = _airtable_table(DAILY_CLOSINGS_TABLE)
-        stores_table = _airtable_table(STORES_TABLE)
+    try:
+        closings_table = _airtable_table(DAILY_CLOSINGS_TABLE)
+
+        # 1) Resolve store_id -> store name (primary field, cached)
+        store_name = resolve_store_display_name(store_id)
+        if not store_name:
+            raise HTTPException(status_code=400, detail="Could not resolve store name")
+
+        safe_store_name = _escape_formula_str(store_name)
+
+        formula = (
+            "AND("
+            "{Verified Status}='Needs Update',"
+            f"FIND('{safe_store_name}', ARRAYJOIN({{Store}}))"
+            ")"
+        )
+
+        def load():
+            records = closings_table.all(
+                formula=formula,
+                sort=["Date"],  # oldest → newest
+                fields=NEEDS_UPDATE_FIELDS,
+            )
+
+            results = []
+            for r in records:
+                f = r.get("fields", {})
+                results.append({
+                    "record_id": r.get("id"),
+                    "business_date": f.get("Date"),
+                    "notes": f.get("Verification Notes", ""),
+                })
+
+            return {
+                "count": len(results),
+                "records": results,
+            }
+
+        key = list_cache_key(CLOSINGS_LIST_PREFIX, "needs-update-list", store_id)
+        return cached(key, LIST_CACHE_TTL, load)
+
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("❌ needs-update-list error")
+        raise HTTPException(status_code=500, detail="Failed to load update list")
+
+
+# -----------------------------------------------------------
+# Verification Queue — FAST, Airtable-filtered version
+# -----------------------------------------------------------
+@app.get("/verification-queue")
+def verification_queue():
+    try:
+        # Airtable handles filtering internally
+        def load():
+            records = DAILY_CLOSINGS.all(
+                formula="OR({Verified Status}='Pending', {Verified Status}='Needs Update')"
+            )
+            return {"records": records}
+
+        key = list_cache_key(CLOSINGS_LIST_PREFIX, "verification-queue")
+        return cached(key, LIST_CACHE_TTL, load)
+
+    except Exception:
+        logger.exception("Airtable error")
+        raise HTTPException(status_code=500, detail="Failed to fetch closings")
+
+# -----------------------------------------------------------
+# 📜 History read (admin view)
+# -----------------------------------------------------------
+# Columns written by _history_payload — the only ones /history returns
+HISTORY_LIST_FIELDS = [
+    "Date",
+    "Store",
+    "Store Normalized",
+    "Tenant ID",
+    "Action",
+    "Changed By",
+    "Timestamp",
+    "Record ID",
+    "Lock Status",
+    "Changed Fields",
+    "Snapshot",
+]
+
+# One template per combination of filters present: (date, store, tenant)
+_HISTORY_FORMULA_TEMPLATES = {
+    (True, True, True): "AND({d}, {{Store Normalized}}='{s}', {{Tenant ID}}='{t}')",
+    (True, True, False): "AND({d}, {{Store Normalized}}='{s}')",
+    (True, False, True): "AND({d}, {{Tenant ID}}='{t}')",
+    (True, False, False): "AND({d})",
+    (False, True, True): "AND({{Store Normalized}}='{s}', {{Tenant ID}}='{t}')",
+    (False, True, False): "AND({{Store Normalized}}='{s}')",
+    (False, False, True): "AND({{Tenant ID}}='{t}')",
+    (False, False, False): None,
+}
+
+
+@lru_cache(maxsize=256)
+def _history_formula(
+    business_date: Optional[str],
+    store: Optional[str],
+    tenant_id: Optional[str],
+) -> Optional[str]:
+    """
+    filterByFormula for /history (None when no filter is given).
+    """
+    template = _HISTORY_FORMULA_TEMPLATES[
+        (bool(business_date), bool(store), bool(tenant_id))
+    ]
+    if template is None:
+        return None
+
+    return template.format(
+        d=_date_formula(business_date) if business_date else "",
+        s=_escape_formula_str(normalize_store_value(store)) if store else "",
+        t=_escape_formula_str(tenant_id) if tenant_id else "",
+    )
+
+@app.get("/history")
+def get_history(
+        business_date: Optional[str] = Query(None),
+        store: Optional[str] = Query(None),
+        tenant_id: Optional[str] = Query(None),
+        limit: int = Query(100),
+):
+    """
+    Fetch history entries for admin view.
+    """
+    try:
+        table = _airtable_table(HISTORY_TABLE)
+
+        formula = _history_formula(business_date, store, tenant_id)
+
+        def load():
+            records = table.all(
+                max_records=limit, formula=formula, fields=HISTORY_LIST_FIELDS
+            )
+            return {
+                "count":
+                len(records),
+                # Airtable records are already {"id", "createdTime", "fields"}
+                "records": records,
+            }
+
+        key = list_cache_key(
+            HISTORY_LIST_PREFIX,
+            business_date,
+            normalize_store_value(store) if store else None,
+            tenant_id,
+            limit,
+        )
+        return cached(key, LIST_CACHE_TTL, load)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("❌ Error fetching history")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# -----------------------------------------------------------
+# ✅ Verification helpers (shared by /verify and /verify/bulk)
+# -----------------------------------------------------------
+VERIFICATION_STATUSES = frozenset({"Pending", "Verified", "Flagged", "Needs Update"})
+
+def _check_verification_status(status: str):
+    if status not in VERIFICATION_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status '{status}'. Expected one of: "
+                   + ", ".join(sorted(VERIFICATION_STATUSES)),
+        )
+
+def _num(fields: dict, key: str) -> float:
+    """
+    Safe numeric extraction from Airtable fields.
+    """
+    try:
+        return float(fields.get(key) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _kitchen_spend_from_fields(fields: dict) -> float:
+    return _num(fields, "Kitchen Budget")
+
+
+def _bar_spend_from_fields(fields: dict) -> float:
+    return _num(fields, "Bar Budget")
+
+
+def _compute_variance(fields: dict) -> float:
+    """
+    Variance (SOURCE OF TRUTH): counted cash minus cash payments and float.
+    """
+    actual_cash = _num(fields, "Actual Cash Counted")
+    cash_payments = _num(fields, "Cash Payments")
+    cash_float = _num(fields, "Cash Float")
+    return actual_cash - cash_payments - cash_float
+
+
+# Weekly budget columns the verify flow reads before deducting
+WEEKLY_BUDGET_DEDUCTION_FIELDS = [
+    "Remaining Budget",
+    "Food Cost Deducted",
+    "Kitchen Cost Deducted",
+    "Bar Cost Deducted",
+]
+
+
+def _get_weekly_budget_record(fields: dict):
+    """
+    Locates the weekly budget row (Draft or Locked) for a closing.
+    Returns (budget_table, budget_record, week_start).
+    """
+    store_ids = fields.get("Store") or []
+    business_date_raw = fields.get("Date")
+
+    if not store_ids or not business_date_raw:
+        return None, None, None
+
+    store_id = store_ids[0]
+
+    store_name = resolve_store_display_name(store_id)
+    if not store_name:
+        store_name = str(store_id)
+
+    safe_store_name = _escape_formula_str(store_name)
+
+    try:
+        business_date = parse_airtable_date(business_date_raw)
+    except Exception:
+        business_date = dt_date.fromisoformat(str(business_date_raw)[:10])
+
+    week_start = monday_of_week(business_date).isoformat()
+    budget_table = _airtable_table(WEEKLY_BUDGETS_TABLE)
+
+    formula = (
+        "AND("
+        f"FIND('{safe_store_name}', ARRAYJOIN({{Store}})),"
+        f"IS_SAME({{Week Start}}, '{week_start}', 'day'),"
+        "OR({Status}='Draft',{Status}='Locked')"
+        ")"
+    )
+
+    records = budget_table.all(
+        formula=formula, max_records=1, fields=WEEKLY_BUDGET_DEDUCTION_FIELDS
+    )
+    if not records:
+        return budget_table, None, week_start
+
+    return budget_table, records[0], week_start
+
+
+def _verification_update_fields(
+    status: str,
+    verified_by: Optional[str],
+    notes: Optional[str],
+    now_iso: str,
+    card_tips=None,
+    returned_change=None,
+    reimbursements=None,
+) -> dict:
+    """
+    Fields written to a closing when its verification status changes.
+    """
+    # -------------------------------------------------------
+    # 1) Base fields that always update
+    # -------------------------------------------------------
+    update_fields = {
+        "Verified Status": status,
+        "Verification Notes": notes or "",
+        "Verified By": verified_by or "System",
+        "Last Updated By": verified_by or "System",
+    }
+
+    # -------------------------------------------------------
+    # 1A) Persist admin-entered deposit adjustments (SAFE)
+    # -------------------------------------------------------
+    if card_tips is not None:
+        update_fields["Card Tips"] = float(card_tips)
+
+    if returned_change is not None:
+        update_fields["Returned Change"] = float(returned_change)
+
+    if reimbursements is not None:
+        update_fields["Reimbursements"] = float(reimbursements)  # ✅ NEW
+
+    # -------------------------------------------------------
+    # 2) Locking behaviour
+    # -------------------------------------------------------
+    if status == "Verified":
+        update_fields["Verified At"] = now_iso
+        update_fields["Lock Status"] = "Locked"
+    else:
+        update_fields["Verified At"] = None
+        update_fields["Lock Status"] = "Unlocked"
+
+    return update_fields
+
+
+def _apply_weekly_budget(
+    table: Table,
+    record_id: str,
+    status: str,
+    before_fields: dict,
+    fields: dict,
+    now_iso: str,
+):
+    """
+    Weekly budget adjustment logic (Total + Kitchen/Bar) after a closing's
+    verification status changed. `before_fields` / `fields` are the closing
+    before and after the update.
+    """
+    prev_status = (before_fields.get("Verified Status") or "").strip()
+    prev_food_deducted = _num(before_fields, "Food Cost Deducted")
 
-        # 1) Resolve store_id -> store name (primary field)
-        store_record = stores_table.get(store_id)
-        store_fields = store_record.get("fields", {}) if store_record else {}
+    # Prior kitchen/bar deducted on THIS closing record (for delta + reversal)
+    prev_kitchen_deducted = _num(before_fields, "Kitchen Cost Deducted")
+    prev_bar_deducted = _num(before_fields, "Bar Cost Deducted")
 
-        store_name = resolve_store_display_name(store_id)
-        if not store_name:
-            raise HTTPException(status_code=400, detail="Could not resolve store name")
+    current_food_deducted = _num(fields, "Food Cost Deducted")
+    current_kitchen_deducted = _num(fields, "Kitchen Cost Deducted")
+    current_bar_deducted = _num(fields, "Bar Cost Deducted")
 
-        safe_store_name = store_name.replace("'", "\\'")
+    if status == "Verified":
+        try:
+            budget_table, budget_record, _ = _get_weekly_budget_record(fields)
 
-        formula = (
-            "AND("
-            "{Verified Status}='Needs Update',"
-            f"FIND('{safe_store_name}', ARRAYJOIN({{Store}}))"
-            ")"
-        )
+            # -----------------------------
+            # Existing TOTAL food spend logic
+            # -----------------------------
+            new_food_spend = float(food_spend_from_fields(fields) or 0)
+            delta = new_food_spend - prev_food_deducted
+
+            if budget_record:
+                if not (delta == 0 and prev_status == "Verified"):
+                    remaining = _num(budget_record["fields"], "Remaining Budget")
+                    running_deducted = _num(
+                        budget_record["fields"], "Food Cost Deducted"
+                    )
 
-        records = closings_table.all(
-            formula=formula,
-            sort=["Date"]  # oldest → newest
-        )
+                    budget_table.update(
+                        budget_record["id"],
+                        {
+                            "Remaining Budget": remaining - delta,
+                            "Food Cost Deducted": running_deducted + delta,
+                            "Last Updated At": now_iso,
+                        },
+                    )
 
-        results = []
-        for r in records:
-            f = r.get("fields", {})
-            results.append({
-                "record_id": r.get("id"),
-                "business_date": f.get("Date"),
-                "notes": f.get("Verification Notes", ""),
-            })
+            # -----------------------------
+            # Kitchen + Bar deducted tracking
+            # - Updates weekly budget record fields:
+            #   Kitchen Cost Deducted / Bar Cost Deducted (currency)
+            # - Does NOT write to Remaining Kitchen/Bar (FORMULA)
+            # - Writes Kitchen/Bar Cost Deducted on the closing row (ledger)
+            # -----------------------------
+            new_kitchen_spend = _kitchen_spend_from_fields(fields)
+            new_bar_spend = _bar_spend_from_fields(fields)
+
+            delta_kitchen = new_kitchen_spend - prev_kitchen_deducted
+            delta_bar = new_bar_spend - prev_bar_deducted
+
+            if budget_record:
+                wk_kitchen_deducted = _num(budget_record["fields"], "Kitchen Cost Deducted")
+                wk_bar_deducted = _num(budget_record["fields"], "Bar Cost Deducted")
+
+                if not (
+                    delta_kitchen == 0
+                    and delta_bar == 0
+                    and prev_status == "Verified"
+                ):
+                    budget_table.update(
+                        budget_record["id"],
+                        {
+                            "Kitchen Cost Deducted": wk_kitchen_deducted + delta_kitchen,
+                            "Bar Cost Deducted": wk_bar_deducted + delta_bar,
+                            "Last Updated At": now_iso,
+                        },
+                    )
 
-        return {
-            "count": len(results),
-            "records": results,
-        }
+            table.update(
+                record_id,
+                {
+                    "Food Cost Deducted": new_food_spend,
+                    "Kitchen Cost Deducted": new_kitchen_spend,
+                    "Bar Cost Deducted": new_bar_spend,
+                },
+            )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print("❌ needs-update-list error:", str(e))
-        raise HTTPException(status_code=500, detail="Failed to load update list")
+        except Exception:
+            logger.exception("Weekly budget update error")
 
+        return
 
-# -----------------------------------------------------------
-# Verification Queue — FAST, Airtable-filtered version
-# -----------------------------------------------------------
-@app.get("/verification-queue")
-async def verification_queue():
-    try:
-        # Airtable handles filtering internally
-        records = DAILY_CLOSINGS.all(
-            formula="OR({Verified Status}='Pending', {Verified Status}='Needs Update')"
-        )
-        return {"records": records}
+    # -----------------------------
+    # Existing TOTAL reversal logic
+    # -----------------------------
+    if prev_status == "Verified" and current_food_deducted > 0:
+        try:
+            budget_table, budget_record, _ = _get_weekly_budget_record(before_fields)
 
-    except Exception as e:
-        print("Airtable error:", e)
-        raise HTTPException(status_code=500, detail="Failed to fetch closings")
+            if budget_record:
+                remaining = _num(budget_record["fields"], "Remaining Budget")
+                running_deducted = _num(
+                    budget_record["fields"], "Food Cost Deducted"
+                )
 
-# -----------------------------------------------------------
-# 📜 History read (admin view)
-# -----------------------------------------------------------
-@app.get("/history")
-def get_history(
-        business_date: Optional[str] = Query(None),
-        store: Optional[str] = Query(None),
-        tenant_id: Optional[str] = Query(None),
-        limit: int = Query(100),
-):
-    """
-    Fetch history entries for admin view.
-    """
-    try:
-        table = _airtable_table(HISTORY_TABLE)
+                budget_table.update(
+                    budget_record["id"],
+                    {
+                        "Remaining Budget": remaining + current_food_deducted,
+                        "Food Cost Deducted": max(
+                            0, running_deducted - current_food_deducted
+                        ),
+                        "Last Updated At": now_iso,
+                    },
+                )
+
+            table.update(
+                record_id,
+                {
+                    "Food Cost Deducted": 0,
+                }
+            )
+
+        except Exception:
+            logger.exception("Weekly budget reversal error")
+
+    # -----------------------------
+    # Kitchen/Bar reversal logic
+    # - Only reverses if it was previously Verified
+    # - Uses stored "Kitchen/Bar Cost Deducted" on the closing row as the reversal amount
+    # -----------------------------
+    if prev_status == "Verified" and (current_kitchen_deducted > 0 or current_bar_deducted > 0):
+        try:
+            budget_table, budget_record, _ = _get_weekly_budget_record(before_fields)
 
-        clauses: List[str] = []
+            if budget_record:
+                wk_kitchen_deducted = _num(budget_record["fields"], "Kitchen Cost Deducted")
+                wk_bar_deducted = _num(budget_record["fields"], "Bar Cost Deducted")
+
+                budget_table.update(
+                    budget_record["id"],
+                    {
+                        "Kitchen Cost Deducted": max(0, wk_kitchen_deducted - current_kitchen_deducted),
+                        "Bar Cost Deducted": max(0, wk_bar_deducted - current_bar_deducted),
+                        "Last Updated At": now_iso,
+                    },
+                )
 
-        if business_date:
-            clauses.append(
-                f"IS_SAME({{Date}}, DATETIME_PARSE('{business_date}','YYYY-MM-DD'), 'day')"
+            table.update(
+                record_id,
+                {
+                    "Kitchen Cost Deducted": 0,
+                    "Bar Cost Deducted": 0,
+                }
             )
 
-        if store:
-            normalized_store = normalize_store_value(store)
-            clauses.append(f"{{Store Normalized}}='{normalized_store}'")
+        except Exception:
+            logger.exception("Weekly kitchen/bar budget reversal error")
 
-        if tenant_id:
-            clauses.append(f'{{Tenant ID}}="{tenant_id}"')
 
-        formula = "AND(" + ", ".join(clauses) + ")" if clauses else None
+def _send_verification_email(fields: dict, verified_by: Optional[str], notes: Optional[str]):
+    """
+    📧 Verification email (only sent for Verified closings).
+    """
+    store_name = (
+        fields.get("Store Name")
+        or fields.get("Store Normalized")
+        or "Unknown Store"
+    )
 
-        records = table.all(max_records=limit, formula=formula)
-        return {
-            "count":
-            len(records),
-            "records": [{
-                "id": r.get("id"),
-                "fields": r.get("fields", {})
-            } for r in records],
-        }
-    except Exception as e:
-        print("❌ Error fetching history:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+    send_closing_verification_email(
+        store_name=store_name,
+        business_date=fields.get("Date"),
+        cashier_name=fields.get("Submitted By"),
+        verified_by=verified_by or "System",
+        manager_notes=notes or "",
+        closing_fields={
+            **fields,
+            "Computed Variance": _compute_variance(fields),
+        },
+    )
 
 # -----------------------------------------------------------
 # ✅ Verification endpoint (manager review)
 # -----------------------------------------------------------
 @app.post("/verify")
-async def verify_closing(payload: dict):
+def verify_closing(payload: dict):
     """
     Update verification status, notes, and lock state for a closing record.
     Also persists admin-entered deposit adjustments:
@@ -2333,14 +3720,11 @@ async def verify_closing(payload: dict):
     verified_by = payload.get("verified_by")
     notes = payload.get("notes")
 
-    # ✅ Admin-entered fields (optional)
-    card_tips = payload.get("card_tips")
-    returned_change = payload.get("returned_change")
-    reimbursements = payload.get("reimbursements")  # ✅ NEW
-
     if not record_id or not status:
         raise HTTPException(status_code=400, detail="Missing record_id or status")
 
+    _check_verification_status(status)
+
     now_iso = datetime.utcnow().isoformat()
     table = _airtable_table("daily_closing")
 
@@ -2348,317 +3732,149 @@ async def verify_closing(payload: dict):
         # ---------------------------------------------------
         # 0) Fetch BEFORE update (needed for reversal)
         # ---------------------------------------------------
-        before = table.get(record_id)
-        before_fields = before.get("fields", {}) if before else {}
-
-        prev_status = (before_fields.get("Verified Status") or "").strip()
-        prev_food_deducted = float(before_fields.get("Food Cost Deducted", 0) or 0)
-
-        # ✅ NEW: prior kitchen/bar deducted on THIS closing record (for delta + reversal)
-        prev_kitchen_deducted = float(before_fields.get("Kitchen Cost Deducted", 0) or 0)
-        prev_bar_deducted = float(before_fields.get("Bar Cost Deducted", 0) or 0)
-
-        # -------------------------------------------------------
-        # Helper: safe numeric extraction
-        # -------------------------------------------------------
-        def num(fields: dict, key: str) -> float:
-            try:
-                return float(fields.get(key) or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        # -------------------------------------------------------
-        # ✅ NEW: helpers to extract daily kitchen/bar spend from closing fields
-        # -------------------------------------------------------
-        def kitchen_spend_from_fields(fields: dict) -> float:
-            try:
-                return float(fields.get("Kitchen Budget") or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        def bar_spend_from_fields(fields: dict) -> float:
-            try:
-                return float(fields.get("Bar Budget") or 0)
-            except (TypeError, ValueError):
-                return 0.0
-
-        # -------------------------------------------------------
-        # Helper: compute variance (SOURCE OF TRUTH)
-        # -------------------------------------------------------
-        def compute_variance(fields: dict) -> float:
-            actual_cash = num(fields, "Actual Cash Counted")
-            cash_payments = num(fields, "Cash Payments")
-            cash_float = num(fields, "Cash Float")
-            return actual_cash - cash_payments - cash_float
-
-        # -------------------------------------------------------
-        # 1) Base fields that always update
-        # -------------------------------------------------------
-        update_fields = {
-            "Verified Status": status,
-            "Verification Notes": notes or "",
-            "Verified By": verified_by or "System",
-            "Last Updated By": verified_by or "System",
-        }
-
-        # -------------------------------------------------------
-        # 1A) Persist admin-entered deposit adjustments (SAFE)
-        # -------------------------------------------------------
-        if card_tips is not None:
-            update_fields["Card Tips"] = float(card_tips)
-
-        if returned_change is not None:
-            update_fields["Returned Change"] = float(returned_change)
-
-        if reimbursements is not None:
-            update_fields["Reimbursements"] = float(reimbursements)  # ✅ NEW
-
-        # -------------------------------------------------------
-        # 2) Locking behaviour
-        # -------------------------------------------------------
-        if status == "Verified":
-            update_fields["Verified At"] = now_iso
-            update_fields["Lock Status"] = "Locked"
-        else:
-            update_fields["Verified At"] = None
-            update_fields["Lock Status"] = "Unlocked"
+        before = get_record_or_404(table, record_id)
+        before_fields = before.get("fields", {})
+
+        update_fields = _verification_update_fields(
+            status,
+            verified_by,
+            notes,
+            now_iso,
+            card_tips=payload.get("card_tips"),
+            returned_change=payload.get("returned_change"),
+            reimbursements=payload.get("reimbursements"),
+        )
 
         # ---------------------------------------------------
         # 3) Update Airtable record
         # ---------------------------------------------------
-        table.update(record_id, update_fields)
+        # Airtable returns the full record (formula fields recalculated)
+        fresh = table.update(record_id, update_fields)
+        fields = fresh.get("fields", {})
+        invalidate_closing_cache(fields)
 
         # ---------------------------------------------------
-        # Helper: locate the weekly budget row (Draft or Locked)
+        # 4) Weekly budget adjustment logic
         # ---------------------------------------------------
-        def get_locked_weekly_budget_record(fields: dict):
-            store_ids = fields.get("Store") or []
-            business_date_raw = fields.get("Date")
-
-            if not store_ids or not business_date_raw:
-                return None, None, None
-
-            store_id = store_ids[0]
-
-            store_name = resolve_store_display_name(store_id)
-            if not store_name:
-                store_name = str(store_id)
-
-            safe_store_name = store_name.replace("'", "\\'")
-
-            try:
-                business_date = parse_airtable_date(business_date_raw)
-            except Exception:
-                business_date = dt_date.fromisoformat(str(business_date_raw)[:10])
-
-            week_start = monday_of_week(business_date).isoformat()
-            budget_table = _airtable_table(WEEKLY_BUDGETS_TABLE)
-
-            formula = (
-                "AND("
-                f"FIND('{safe_store_name}', ARRAYJOIN({{Store}})),"
-                f"IS_SAME({{Week Start}}, '{week_start}', 'day'),"
-                "OR({Status}='Draft',{Status}='Locked')"
-                ")"
-            )
-
-            records = budget_table.all(formula=formula, max_records=1)
-            if not records:
-                return budget_table, None, week_start
-
-            return budget_table, records[0], week_start
+        _apply_weekly_budget(table, record_id, status, before_fields, fields, now_iso)
 
         # ---------------------------------------------------
-        # 4) Weekly budget adjustment logic (UPDATED: Total + Kitchen/Bar)
+        # 5) 📧 VERIFICATION EMAIL (ONLY WHEN VERIFIED)
         # ---------------------------------------------------
-        fresh = table.get(record_id)
-        fields = fresh.get("fields", {}) if fresh else {}
+        if status == "Verified":
+            _send_verification_email(fields, verified_by, notes)
 
-        current_food_deducted = num(fields, "Food Cost Deducted")
-        current_kitchen_deducted = num(fields, "Kitchen Cost Deducted")
-        current_bar_deducted = num(fields, "Bar Cost Deducted")
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("Airtable update or verification email error")
+        raise HTTPException(status_code=500, detail="Failed to update verification status")
 
-        if status == "Verified":
-            try:
-                budget_table, budget_record, _ = get_locked_weekly_budget_record(fields)
-
-                # -----------------------------
-                # Existing TOTAL food spend logic
-                # -----------------------------
-                new_food_spend = float(food_spend_from_fields(fields) or 0)
-                prev_food_spend = float(prev_food_deducted or 0)
-                delta = new_food_spend - prev_food_spend
-
-                if budget_record:
-                    if not (delta == 0 and prev_status == "Verified"):
-                        remaining = num(budget_record["fields"], "Remaining Budget")
-                        running_deducted = num(
-                            budget_record["fields"], "Food Cost Deducted"
-                        )
-
-                        budget_table.update(
-                            budget_record["id"],
-                            {
-                                "Remaining Budget": remaining - delta,
-                                "Food Cost Deducted": running_deducted + delta,
-                                "Last Updated At": now_iso,
-                            },
-                        )
-
-                table.update(
-                    record_id,
-                    {
-                        "Food Cost Deducted": new_food_spend,
-                    },
-                )
+    return {
+        "status": "success",
+        "record_id": record_id,
+        "new_status": status,
+        "notes_saved": notes or "",
+    }
 
-                # -----------------------------
-                # ✅ NEW: Kitchen + Bar deducted tracking
-                # - Updates weekly budget record fields:
-                #   Kitchen Cost Deducted / Bar Cost Deducted (currency)
-                # - Does NOT write to Remaining Kitchen/Bar (FORMULA)
-                # - Writes Kitchen/Bar Cost Deducted on the closing row (ledger)
-                # -----------------------------
-                new_kitchen_spend = kitchen_spend_from_fields(fields)
-                new_bar_spend = bar_spend_from_fields(fields)
-
-                delta_kitchen = float(new_kitchen_spend or 0) - float(prev_kitchen_deducted or 0)
-                delta_bar = float(new_bar_spend or 0) - float(prev_bar_deducted or 0)
-
-                if budget_record:
-                    wk_kitchen_deducted = num(budget_record["fields"], "Kitchen Cost Deducted")
-                    wk_bar_deducted = num(budget_record["fields"], "Bar Cost Deducted")
-
-                    if not (
-                        delta_kitchen == 0
-                        and delta_bar == 0
-                        and prev_status == "Verified"
-                    ):
-                        budget_table.update(
-                            budget_record["id"],
-                            {
-                                "Kitchen Cost Deducted": wk_kitchen_deducted + delta_kitchen,
-                                "Bar Cost Deducted": wk_bar_deducted + delta_bar,
-                                "Last Updated At": now_iso,
-                            },
-                        )
-
-                table.update(
-                    record_id,
-                    {
-                        "Kitchen Cost Deducted": new_kitchen_spend,
-                        "Bar Cost Deducted": new_bar_spend,
-                    },
-                )
+# -----------------------------------------------------------
+# ✅ Bulk verification (end-of-day batch)
+# -----------------------------------------------------------
+VERIFY_BATCH_SIZE = 10  # Airtable's per-request record limit
 
-            except Exception as budget_err:
-                print("Weekly budget update error:", budget_err)
 
-        else:
-            # -----------------------------
-            # Existing TOTAL reversal logic
-            # -----------------------------
-            if prev_status == "Verified" and current_food_deducted > 0:
-                try:
-                    budget_table, budget_record, _ = get_locked_weekly_budget_record(
-                        before_fields
-                    )
+@app.post("/verify/bulk")
+def verify_closings_bulk(payload: BulkVerifyPayload):
+    """
+    Applies one verification status to many closings.
 
-                    if budget_record:
-                        remaining = num(budget_record["fields"], "Remaining Budget")
-                        running_deducted = num(
-                            budget_record["fields"], "Food Cost Deducted"
-                        )
-
-                        budget_table.update(
-                            budget_record["id"],
-                            {
-                                "Remaining Budget": remaining + current_food_deducted,
-                                "Food Cost Deducted": max(
-                                    0, running_deducted - current_food_deducted
-                                ),
-                                "Last Updated At": now_iso,
-                            },
-                        )
-
-                    table.update(
-                        record_id,
-                        {
-                            "Food Cost Deducted": 0,
-                        }
-                    )
+    Records are fetched and updated 10 at a time (batch_update), instead of
+    one /verify round-trip per record. Weekly budget adjustments and emails
+    still run per closing, since each one touches its own budget row.
+    """
+    record_ids = list(dict.fromkeys(payload.record_ids))
+    status = payload.status
+    verified_by = payload.verified_by
+    notes = payload.notes
 
-                except Exception as budget_err:
-                    print("Weekly budget reversal error:", budget_err)
+    _check_verification_status(status)
 
-            # -----------------------------
-            # ✅ NEW: Kitchen/Bar reversal logic
-            # - Only reverses if it was previously Verified
-            # - Uses stored "Kitchen/Bar Cost Deducted" on the closing row as the reversal amount
-            # -----------------------------
-            if prev_status == "Verified" and (current_kitchen_deducted > 0 or current_bar_deducted > 0):
-                try:
-                    budget_table, budget_record, _ = get_locked_weekly_budget_record(
-                        before_fields
-                    )
+    now_iso = datetime.utcnow().isoformat()
+    table = _airtable_table("daily_closing")
+    update_fields = _verification_update_fields(status, verified_by, notes, now_iso)
 
-                    if budget_record:
-                        wk_kitchen_deducted = num(budget_record["fields"], "Kitchen Cost Deducted")
-                        wk_bar_deducted = num(budget_record["fields"], "Bar Cost Deducted")
-
-                        budget_table.update(
-                            budget_record["id"],
-                            {
-                                "Kitchen Cost Deducted": max(0, wk_kitchen_deducted - current_kitchen_deducted),
-                                "Bar Cost Deducted": max(0, wk_bar_deducted - current_bar_deducted),
-                                "Last Updated At": now_iso,
-                            },
-                        )
-
-                    table.update(
-                        record_id,
-                        {
-                            "Kitchen Cost Deducted": 0,
-                            "Bar Cost Deducted": 0,
-                        }
-                    )
+    updated: List[str] = []
+    not_found: List[str] = []
 
-                except Exception as budget_err:
-                    print("Weekly kitchen/bar budget reversal error:", budget_err)
+    try:
+        for start in range(0, len(record_ids), VERIFY_BATCH_SIZE):
+            chunk = record_ids[start:start + VERIFY_BATCH_SIZE]
+
+            # BEFORE snapshot for the whole chunk in one request (needed for reversal)
+            formula = "OR(" + ",".join(
+                f"RECORD_ID()='{_escape_formula_str(rid)}'" for rid in chunk
+            ) + ")"
+            before_by_id = {
+                rec["id"]: rec.get("fields", {})
+                for rec in table.all(formula=formula)
+            }
 
-        # ---------------------------------------------------
-        # 5) 📧 VERIFICATION EMAIL (ONLY WHEN VERIFIED)
-        # ---------------------------------------------------
-        if status == "Verified":
-            store_name = (
-                fields.get("Store Name")
-                or fields.get("Store Normalized")
-                or "Unknown Store"
+            found = [rid for rid in chunk if rid in before_by_id]
+            not_found.extend(rid for rid in chunk if rid not in before_by_id)
+            if not found:
+                continue
+
+            fresh_records = table.batch_update(
+                [{"id": rid, "fields": update_fields} for rid in found]
             )
 
-            computed_variance = compute_variance(fields)
+            history = []
+            for fresh in fresh_records:
+                rid = fresh["id"]
+                fields = fresh.get("fields", {})
+                invalidate_closing_cache(fields)
 
-            send_closing_verification_email(
-                store_name=store_name,
-                business_date=fields.get("Date"),
-                cashier_name=fields.get("Submitted By"),
-                verified_by=verified_by or "System",
-                manager_notes=notes or "",
-                closing_fields={
-                    **fields,
-                    "Computed Variance": computed_variance,
-                },
-            )
+                _apply_weekly_budget(
+                    table, rid, status, before_by_id[rid], fields, now_iso
+                )
 
-    except Exception as e:
-        print("Airtable update or verification email error:", e)
-        raise HTTPException(status_code=500, detail="Failed to update verification status")
+                if status == "Verified":
+                    try:
+                        _send_verification_email(fields, verified_by, notes)
+                    except Exception as e:
+                        logger.warning("⚠️ Verification email failed (non-blocking): %s", e)
+
+                history.append(dict(
+                    action=status,
+                    store=fields.get("Store Name"),
+                    business_date=fields.get("Date"),
+                    fields_snapshot=fields,
+                    submitted_by=verified_by or "System",
+                    record_id=rid,
+                    lock_status=fields.get("Lock Status"),
+                    changed_fields=list(update_fields.keys()),
+                    tenant_id=fields.get("Tenant ID") or DEFAULT_TENANT_ID,
+                    timestamp=now_iso,
+                ))
+                updated.append(rid)
+
+            log_history_in_background(*history)
+
+    except Exception:
+        logger.exception("❌ Bulk verification error")
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "message": "Failed to update verification status",
+                "updated": updated,
+            },
+        )
 
     return {
         "status": "success",
-        "record_id": record_id,
         "new_status": status,
-        "notes_saved": notes or "",
+        "updated": updated,
+        "not_found": not_found,
     }
 
 # -----------------------------------------------------------
@@ -2677,11 +3893,15 @@ def dashboard_closing_summary(
         None,
         description="Legacy alias for store_name; kept for backwards compatibility",
     ),
+    include_raw: bool = Query(
+        False, description="Include the full Airtable record as raw_fields"
+    ),
 ):
     """
     Dashboard-friendly endpoint that returns:
     - The unique closing record for a given store + date
     - Summary metrics sourced from Airtable formulas (single source of truth)
+    - raw_fields (full Airtable record) only when include_raw=true
 
     Priority:
     1. Use store_id (linked Store record) if provided
@@ -2710,13 +3930,7 @@ def dashboard_closing_summary(
         record = None
 
         if store_id:
-            date_formula = (
-                "IS_SAME("
-                "{{Date}}, "
-                "DATETIME_PARSE('{bd}', 'YYYY-MM-DD'), "
-                "'day'"
-                ")"
-            ).format(bd=business_date)
+            date_formula = _date_formula(business_date)
 
             candidates = table.all(formula=date_formula, max_records=50)
 
@@ -2740,16 +3954,7 @@ def dashboard_closing_summary(
 
             if effective_store:
                 normalized = normalize_store_value(effective_store)
-                formula = (
-                    "AND("
-                    "{{Store Normalized}}='{normalized}', "
-                    "IS_SAME("
-                    "{{Date}}, "
-                    "DATETIME_PARSE('{bd}', 'YYYY-MM-DD'), "
-                    "'day'"
-                    ")"
-                    ")"
-                ).format(normalized=normalized, bd=business_date)
+                formula = _formula_store_date(normalized, business_date)
 
                 records = table.all(formula=formula, max_records=1)
                 if records:
@@ -2759,15 +3964,17 @@ def dashboard_closing_summary(
         # No record found
         # -----------------------------
         if not record:
-            return {
+            response = {
                 "status": "empty",
                 "business_date": business_date,
                 "store": store_name or store,
                 "record_id": None,
                 "lock_status": "Unlocked",
                 "summary": None,
-                "raw_fields": {},
             }
+            if include_raw:
+                response["raw_fields"] = {}
+            return response
 
         # -----------------------------
         # Build summary from Airtable fields
@@ -2877,7 +4084,7 @@ def dashboard_closing_summary(
             or fields.get("Store")
         )
 
-        return {
+        response = {
             "status": "found",
             "business_date": business_date,
             "store": store_display,
@@ -2885,119 +4092,257 @@ def dashboard_closing_summary(
             "lock_status": lock_status,
             "summary": summary,
             "formulas": airtable_formulas,
-            "raw_fields": fields,
         }
+        if include_raw:
+            response["raw_fields"] = fields
+        return response
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Error in /dashboard/closings:", e)
+        logger.exception("❌ Error in /dashboard/closings")
         raise HTTPException(status_code=500, detail=str(e))
 
 # -----------------------------------------------------------
 # 📊 Management summary /reports/daily-summary
 # -----------------------------------------------------------
+# Bound str.format: the format string is parsed once, not per call.
+# Memoized on the exact amount — zero and repeated totals recur across
+# per-store summaries. (Keyed on the value itself rather than rounded
+# centavos, so the output never shifts at a half-peso boundary.)
+peso = lru_cache(maxsize=4096)("\u20b1{:,.0f}".format)
+
+
+# Static tail of the summary preview (until AI summaries are enabled)
+# (pre-joined; the leading blank line separates it from the body)
+_STATIC_FOOTER = (
+    "\n"
+    "\nAI-generated summary is not enabled yet."
+    "\nOnce configured, this section will show:"
+    "\n- Total sales and cash across all stores"
+    "\n- Variances and flagged records"
+    "\n- Key notes for management review"
+)
+
+
+# Columns summed by the report — the only ones fetched (plus the store label)
+SUMMARY_SUM_FIELDS = (
+    "Total Sales",
+    "Net Sales",
+    "Cash Payments",
+    "Card Payments",
+    "Digital Payments",
+    "Grab Payments",
+    "Voucher Payments",
+    "Bank Transfer Payments",
+    "Marketing Expenses",
+    "Actual Cash Counted",
+    "Cash Float",
+    "Kitchen Budget",
+    "Bar Budget",
+    "Non Food Budget",
+    "Staff Meal Budget",
+    "Cash for Deposit",
+    "Transfer Needed",
+)
+SUMMARY_FETCH_FIELDS = ["Store", "Store Name", "Verified Status", *SUMMARY_SUM_FIELDS]
+
+# Past, fully reviewed days are cached long when Redis is shared (writes
+# still invalidate them)
+FINAL_VERIFIED_STATUSES = frozenset({"Verified", "Flagged"})
+SUMMARY_SETTLED_AFTER_DAYS = 2
+SUMMARY_SETTLED_TTL = 6 * 3600
+
+
+def _summary_store_label(fields: dict) -> Optional[str]:
+    store_value = fields.get("Store Name") or fields.get("Store")
+    # Linked Store comes back as a list of record IDs
+    if isinstance(store_value, list):
+        store_value = resolve_store_display_name(store_value[0]) if store_value else None
+    if store_value == "Unknown":
+        return None
+    return store_value
+
+
+# Columns shown in the preview, read from the totals in one call
+_preview_values = itemgetter(
+    "Total Sales",
+    "Net Sales",
+    "Cash+Card+Digital",
+    "Marketing Expenses",
+    "Cash for Deposit",
+    "Transfer Needed",
+)
+
+# One C-level call pulls every summed column out of a row
+_summary_values = itemgetter(*SUMMARY_SUM_FIELDS)
+_SUMMARY_DEFAULTS = dict.fromkeys(SUMMARY_SUM_FIELDS, 0)
+
+
+def _fold_summary_rows(agg: Dict[str, float], rows: List[dict]):
+    """
+    Adds the numeric SUMMARY_SUM_FIELDS of `rows` into `agg`: one
+    itemgetter call per row, then one builtin sum() per column.
+    """
+    columns = zip(*(_summary_values({**_SUMMARY_DEFAULTS, **f}) for f in rows))
+
+    for key, column in zip(SUMMARY_SUM_FIELDS, columns):
+        # Exact type checks: Airtable numbers decode as int/float only
+        # (and a stray boolean is not a peso amount)
+        agg[key] += sum(
+            val for val in column
+            if type(val) is float or type(val) is int
+        )
+
+
+def _build_daily_summary(business_date: str, store: Optional[str]):
+    """
+    Airtable fetch + aggregation behind /reports/daily-summary.
+
+    Returns (response, is_final) — is_final is True when every closing
+    in the summary is Verified or Flagged (no further edits expected).
+    """
+    closings_table = _airtable_table(DAILY_CLOSINGS_TABLE)
+
+    view, formula_date = _closings_date_source(business_date)
+    options = {"view": view} if view else {}
+
+    formula = _formula_store_date(
+        normalize_store_value(store) if store else None, formula_date
+    )
+    if formula:
+        options["formula"] = formula
+
+    # Fold each page as it arrives (memory bounded to one page)
+    agg = dict.fromkeys(SUMMARY_SUM_FIELDS, 0.0)
+    stores_seen = set()
+    record_count = 0
+    is_final = True
+
+    for page in closings_table.iterate(
+        fields=SUMMARY_FETCH_FIELDS,
+        page_size=100,
+        max_records=100,
+        **options,
+    ):
+        rows = [r.get("fields", {}) for r in page]
+        record_count += len(rows)
+        _fold_summary_rows(agg, rows)
+        stores_seen.update(filter(None, map(_summary_store_label, rows)))
+        is_final = is_final and all(
+            f.get("Verified Status") in FINAL_VERIFIED_STATUSES for f in rows
+        )
+
+    # Derived total, computed once with the aggregate
+    agg["Cash+Card+Digital"] = (
+        agg["Cash Payments"] + agg["Card Payments"] + agg["Digital Payments"]
+    )
+
+    if not record_count:
+        return {
+            "business_date":
+            business_date,
+            "store":
+            store,
+            "preview":
+            f"No closings found for {business_date}" +
+            (f" at {store}" if store else ""),
+        }, False
+
+    if store:
+        scope = f"Store: {store}"
+    else:
+        scope = f"Stores included: {', '.join(sorted(stores_seen)) or 'N/A'}"
+
+    # Locals: one global lookup for peso, one hash per column
+    p = peso
+    (
+        total_sales, net_sales, cash_card_digital,
+        marketing, cash_for_deposit, transfer_needed,
+    ) = _preview_values(agg)
+
+    preview = (
+        f"Management Summary for {business_date}\n"
+        f"{scope}\n"
+        "\n"
+        f"Total Sales: {p(total_sales)}\n"
+        f"Net Sales: {p(net_sales)}\n"
+        f"Cash + Digital + Card: {p(cash_card_digital)}\n"
+        f"Marketing Expenses: {p(marketing)}\n"
+        f"Cash for Deposit: {p(cash_for_deposit)}, "
+        f"Transfer Needed: {p(transfer_needed)}"
+        f"{_STATIC_FOOTER}"
+    )
+
+    return {
+        "business_date": business_date,
+        "store": store,
+        "preview": preview,
+    }, is_final
+
+
+def _cached_daily_summary(business_date: str, store: Optional[str]) -> dict:
+    key = list_cache_key(SUMMARY_PREFIX, business_date, store)
+    hit = cache_get(key)
+    if hit is not None:
+        return hit
+
+    summary, is_final = _build_daily_summary(business_date, store)
+
+    # Closed days (older than SUMMARY_SETTLED_AFTER_DAYS, all verified)
+    # no longer change — keep them for hours instead of seconds. Only with
+    # Redis: the in-process cache is per worker, so a late correction would
+    # be invalidated in one worker and stale in the others for hours.
+    settled_before = (
+        dt_date.today() - timedelta(days=SUMMARY_SETTLED_AFTER_DAYS)
+    ).isoformat()
+    ttl = (
+        SUMMARY_SETTLED_TTL
+        if is_final
+        and business_date < settled_before
+        and get_redis() is not None
+        else SUMMARY_CACHE_TTL
+    )
+
+    cache_set(key, summary, ttl)
+    return summary
+
+
 @app.get("/reports/daily-summary")
 def daily_summary(
     business_date: str = Query(..., description="Business date YYYY-MM-DD"),
     store: Optional[str] = Query(
         None, description="Optional store filter, e.g. `Nonie's`"),
+    as_text: bool = Query(
+        False,
+        description="Return only the preview as text/plain "
+                    "(business date / store in X- headers)",
+    ),
 ):
     """
     Very simple daily summary for management.
     """
     try:
-        closings_table = _airtable_table(DAILY_CLOSINGS_TABLE)
-
-        clauses = [
-            f"IS_SAME({{Date}}, DATETIME_PARSE('{business_date}','YYYY-MM-DD'), 'day')"
-        ]
-
-        if store:
-            normalized_store = normalize_store_value(store)
-            clauses.append(f"{{Store Normalized}}='{normalized_store}'")
-
-        formula = "AND(" + ", ".join(clauses) + ")"
-
-        records = closings_table.all(formula=formula, max_records=100)
-        if not records:
-            return {
-                "business_date":
-                business_date,
-                "store":
-                store,
-                "preview":
-                f"No closings found for {business_date}" +
-                (f" at {store}" if store else ""),
-            }
-
-        agg = defaultdict(float)
-        stores_seen = set()
-
-        for r in records:
-            f = r.get("fields", {})
-            stores_seen.add(f.get("Store", "Unknown"))
-            for key in [
-                    "Total Sales",
-                    "Net Sales",
-                    "Cash Payments",
-                    "Card Payments",
-                    "Digital Payments",
-                    "Grab Payments",
-                    "Voucher Payments",
-                    "Bank Transfer Payments",
-                    "Marketing Expenses",
-                    "Actual Cash Counted",
-                    "Cash Float",
-                    "Kitchen Budget",
-                    "Bar Budget",
-                    "Non Food Budget",
-                    "Staff Meal Budget",
-                    "Cash for Deposit",
-                    "Transfer Needed",
-            ]:
-                val = f.get(key)
-                if isinstance(val, (int, float)):
-                    agg[key] += float(val)
-
-        def peso(n: float) -> str:
-            return f"₱{n:,.0f}"
-
-        lines = []
-        lines.append(f"Management Summary for {business_date}")
-        if store:
-            lines.append(f"Store: {store}")
-        else:
-            joined = (", ".join(
-                sorted(s for s in stores_seen if s != "Unknown")) or "N/A")
-            lines.append(f"Stores included: {joined}")
-
-        lines.append("")
-        lines.append(f"Total Sales: {peso(agg['Total Sales'])}")
-        lines.append(f"Net Sales: {peso(agg['Net Sales'])}")
-        lines.append(
-            "Cash + Digital + Card: "
-            f"{peso(agg['Cash Payments'] + agg['Card Payments'] + agg['Digital Payments'])}"
-        )
-        lines.append(f"Marketing Expenses: {peso(agg['Marketing Expenses'])}")
-        lines.append(f"Cash for Deposit: {peso(agg['Cash for Deposit'])}, "
-                     f"Transfer Needed: {peso(agg['Transfer Needed'])}")
-        lines.append("")
-        lines.append("AI-generated summary is not enabled yet.")
-        lines.append("Once configured, this section will show:")
-        lines.append("- Total sales and cash across all stores")
-        lines.append("- Variances and flagged records")
-        lines.append("- Key notes for management review")
+        summary = _cached_daily_summary(business_date, store)
+
+        if as_text:
+            # Plain body: no JSON escaping pass over the preview.
+            # Header values must be latin-1, so the store is URL-quoted.
+            return PlainTextResponse(
+                summary["preview"],
+                headers={
+                    "X-Business-Date": business_date,
+                    "X-Store": quote(store or ""),
+                },
+            )
 
-        return {
-            "business_date": business_date,
-            "store": store,
-            "preview": "\n".join(lines),
-        }
+        return summary
 
-    except Exception as e:
-        print("❌ Error in daily_summary:", e)
-        raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("❌ Error in daily_summary")
+        raise HTTPException(status_code=500, detail="Failed to build daily summary")
 
 
 # -----------------------------------------------------------
@@ -3007,5 +4352,21 @@ if __name__ == "__main__":
     import uvicorn
 
     port = int(os.environ.get("PORT", 8080))
-    print(f"✅ Server starting on port {port}")
-    uvicorn.run("main:app", host="0.0.0.0", port=port, log_level="info")
+    # I/O-bound (Airtable) — a few workers is plenty; WEB_CONCURRENCY overrides.
+    # Without Redis, caches are per worker, so default to one.
+    default_workers = min(4, os.cpu_count() or 1) if get_redis() is not None else 1
+    workers = int(os.environ.get("WEB_CONCURRENCY") or default_workers)
+    # Workers read this to split the local Airtable rate limit
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    print(f"✅ Server starting on port {port} ({workers} workers)")
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        log_level=LOG_LEVEL.lower(),
+        # Per-request access lines cost a write each; ACCESS_LOG=0 turns them off
+        access_log=os.environ.get("ACCESS_LOG", "1") != "0",
+    )